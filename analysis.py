@@ -0,0 +1,308 @@
+import re
+from typing import Any
+
+from .ganzhi import BRANCHES, parse_kong, parse_pillars, xun_kong
+from .hexagram import derive_hexagrams
+from .keys import (
+    BASE_INFO_KEY,
+    FIELD_BEN_YAO,
+    FIELD_BIAN_YAO,
+    FIELD_FU_SHEN,
+    FIELD_INDEX,
+    FIELD_MOVING,
+    FIELD_SHI_YING,
+    YAO_DATA_KEY,
+)
+from .parser import BRANCH_WUXING, KIN_MAP
+
+BRANCH_INDEX = {branch: i for i, branch in enumerate(BRANCHES)}
+GENERATES = {"木": "火", "火": "土", "土": "金", "金": "水", "水": "木"}
+OVERCOMES = {"木": "土", "土": "水", "水": "火", "火": "金", "金": "木"}
+KIN_NAMES = frozenset(KIN_MAP.values())
+# 进神 pairs (from, to); the reversed pairs are 退神.
+ADVANCE_PAIRS = frozenset(
+    zip("亥寅巳申丑辰未戌", "子卯午酉辰未戌丑"),
+)
+RETREAT_PAIRS = frozenset((b, a) for a, b in ADVANCE_PAIRS)
+
+REL_TOKEN_PATTERN = re.compile(r"^(父母|兄弟|子孙|妻财|官鬼)([子丑寅卯辰巳午未申酉戌亥])")
+
+
+def is_clash(a: str, b: str) -> bool:
+    return (BRANCH_INDEX[a] - BRANCH_INDEX[b]) % 12 == 6
+
+
+def is_combine(a: str, b: str) -> bool:
+    return (BRANCH_INDEX[a] + BRANCH_INDEX[b]) % 12 == 1
+
+
+def season_state(element: str, month_element: str) -> str:
+    """旺相休囚死 of ``element`` in a month ruled by ``month_element``."""
+    if element == month_element:
+        return "旺"
+    if GENERATES[month_element] == element:
+        return "相"
+    if GENERATES[element] == month_element:
+        return "休"
+    if OVERCOMES[element] == month_element:
+        return "囚"
+    return "死"
+
+
+def element_relation(source: str, target: str) -> str | None:
+    """How ``source`` acts on ``target``: 生, 克, 比和 or None (reverse only)."""
+    if source == target:
+        return "比和"
+    if GENERATES[source] == target:
+        return "生"
+    if OVERCOMES[source] == target:
+        return "克"
+    return None
+
+
+def split_rel_token(token: str | None) -> tuple[str, str, str] | None:
+    """'妻财戌土' -> ('妻财', '戌', '土')."""
+    m = REL_TOKEN_PATTERN.match(token or "")
+    if not m:
+        return None
+    return m.group(1), m.group(2), BRANCH_WUXING[m.group(2)]
+
+
+def parse_day_kong(text: str | None) -> tuple[str, ...]:
+    """旬空 of the day pillar from 空亡_raw (year/month/day/hour order)."""
+    groups = parse_kong(text)
+    if len(groups) >= 3:
+        return tuple(groups[2])
+    if len(groups) == 1:
+        return tuple(groups[0])
+    return ()
+
+
+def analyze_chart(parsed_json: dict[str, Any]) -> dict[str, list[str]]:
+    """Standard chart relationships from table lookups, as short fact lines."""
+    base = parsed_json.get(BASE_INFO_KEY) or {}
+    yao_list = sorted(
+        (
+            item
+            for item in parsed_json.get(YAO_DATA_KEY) or []
+            if isinstance(item, dict)
+        ),
+        key=lambda x: x.get(FIELD_INDEX) or 0,
+    )
+    pillars = parse_pillars(base.get("四柱"))
+    month = BRANCHES[pillars["月"] % 12] if "月" in pillars else ""
+    day = BRANCHES[pillars["日"] % 12] if "日" in pillars else ""
+    if "日" in pillars:
+        kong = tuple(xun_kong(pillars["日"]))
+    else:
+        kong = parse_day_kong(base.get("空亡_raw"))
+
+    facts: dict[str, list[str]] = {
+        "日月": [],
+        "卦": [],
+        "爻": [],
+        "动变": [],
+        "生克": [],
+        "伏神": [],
+    }
+    if month:
+        facts["日月"].append(f"月建{month}（{BRANCH_WUXING[month]}）")
+    if day:
+        facts["日月"].append(f"日辰{day}（{BRANCH_WUXING[day]}）")
+    if kong:
+        facts["日月"].append(f"旬空{''.join(kong)}")
+
+    ben_hex, bian_hex = derive_hexagrams(yao_list)
+    if ben_hex:
+        facts["卦"].append(
+            f"本卦{ben_hex.name}，{ben_hex.palace}宫（{ben_hex.palace_element}），"
+            f"世{ben_hex.shi}爻、应{ben_hex.ying}爻"
+        )
+    if bian_hex and bian_hex is not ben_hex:
+        facts["卦"].append(f"变卦{bian_hex.name}，{bian_hex.palace}宫")
+
+    lines: dict[int, tuple[str, str, str]] = {}
+    # Every line of the 变卦 column: a changed trigram re-assigns the 纳甲 of
+    # its static lines too.
+    bian_lines: dict[int, tuple[str, str, str]] = {}
+    changed: dict[int, tuple[str, str, str]] = {}
+    for item in yao_list:
+        rel = split_rel_token(item.get(FIELD_BEN_YAO))
+        if rel:
+            lines[item[FIELD_INDEX]] = rel
+        bian = split_rel_token(item.get(FIELD_BIAN_YAO))
+        if bian:
+            bian_lines[item[FIELD_INDEX]] = bian
+            if item.get(FIELD_MOVING):
+                changed[item[FIELD_INDEX]] = bian
+
+    facts["卦"].extend(_pair_facts("本卦", lines))
+    if changed:
+        facts["卦"].extend(_pair_facts("变卦", bian_lines))
+
+    for item in yao_list:
+        index = item[FIELD_INDEX]
+        rel = lines.get(index)
+        if not rel:
+            continue
+        moving = index in changed
+        label = _line_label(item, rel)
+        states = []
+        if month:
+            states.append(f"月{season_state(rel[2], BRANCH_WUXING[month])}")
+            if is_clash(month, rel[1]):
+                states.append("月破")
+        if day:
+            states.append(_day_state(rel, day, moving, states))
+        if rel[1] in kong:
+            states.append("旬空")
+        facts["爻"].append(f"{label}：{'、'.join(states) or '无'}")
+
+    for index, bian in changed.items():
+        rel = lines.get(index)
+        if not rel:
+            continue
+        tags = _change_tags(rel, bian)
+        if bian[1] in kong:
+            tags.append("化空")
+        if month and is_clash(month, bian[1]):
+            tags.append("化月破")
+        facts["动变"].append(
+            f"{_pos_name(index)} {''.join(rel)}动化{''.join(bian)}：{'、'.join(tags)}"
+        )
+        for other, target in lines.items():
+            if other == index:
+                continue
+            relation = element_relation(rel[2], target[2])
+            if relation in ("生", "克"):
+                facts["生克"].append(
+                    f"{_pos_name(index)}动{relation}{_pos_name(other)}{''.join(target)}"
+                )
+
+    facts["伏神"].extend(_fu_shen_facts(yao_list, lines, month, day, kong))
+    return {key: value for key, value in facts.items() if value}
+
+
+def format_facts(facts: dict[str, list[str]]) -> str:
+    return "\n".join(f"[{key}] " + "；".join(values) for key, values in facts.items())
+
+
+def format_rules_summary(
+    parsed_json: dict[str, Any], facts: dict[str, list[str]]
+) -> str:
+    base = parsed_json.get(BASE_INFO_KEY) or {}
+    lines = ["六爻规则速览（本地查表推算，未调用 AI）"]
+    if base.get("占问事由"):
+        lines.append(f"占问：{base['占问事由']}")
+    for key, values in facts.items():
+        lines.append(f"【{key}】")
+        lines.extend(f"- {value}" for value in values)
+    return "\n".join(lines)
+
+
+def _pos_name(index: int) -> str:
+    return ("初爻", "二爻", "三爻", "四爻", "五爻", "上爻")[index - 1]
+
+
+def _line_label(item: dict[str, Any], rel: tuple[str, str, str]) -> str:
+    shi_ying = item.get(FIELD_SHI_YING)
+    mark = f"（{shi_ying}）" if shi_ying else ""
+    moving = "动" if item.get(FIELD_MOVING) else ""
+    return f"{_pos_name(item[FIELD_INDEX])}{mark} {''.join(rel)}{moving}"
+
+
+def _day_state(
+    rel: tuple[str, str, str], day: str, moving: bool, states: list[str]
+) -> str:
+    if is_clash(day, rel[1]):
+        if moving:
+            return "日冲"
+        strong = any(state in ("月旺", "月相") for state in states)
+        return "日冲暗动" if strong else "日冲日破"
+    if is_combine(day, rel[1]):
+        return "日合"
+    relation = element_relation(BRANCH_WUXING[day], rel[2])
+    if relation == "比和":
+        return "日扶"
+    if relation == "生":
+        return "日生"
+    if relation == "克":
+        return "日克"
+    if GENERATES[rel[2]] == BRANCH_WUXING[day]:
+        return "泄于日"
+    return "克日"
+
+
+def _change_tags(rel: tuple[str, str, str], bian: tuple[str, str, str]) -> list[str]:
+    tags = []
+    if (rel[1], bian[1]) in ADVANCE_PAIRS:
+        tags.append("化进神")
+    elif (rel[1], bian[1]) in RETREAT_PAIRS:
+        tags.append("化退神")
+    relation = element_relation(bian[2], rel[2])
+    if relation == "生":
+        tags.append("回头生")
+    elif relation == "克":
+        tags.append("回头克")
+    elif relation == "比和":
+        tags.append("化出比和")
+    elif GENERATES[rel[2]] == bian[2]:
+        tags.append("化泄")
+    else:
+        tags.append("克变")
+    if is_clash(rel[1], bian[1]):
+        tags.append("化冲")
+    elif is_combine(rel[1], bian[1]):
+        tags.append("化合")
+    return tags
+
+
+def _pair_facts(name: str, lines: dict[int, tuple[str, str, str]]) -> list[str]:
+    if len(lines) != 6:
+        return []
+    pairs = [(lines[i][1], lines[i + 3][1]) for i in (1, 2, 3)]
+    if all(is_clash(a, b) for a, b in pairs):
+        return [f"{name}为六冲卦"]
+    if all(is_combine(a, b) for a, b in pairs):
+        return [f"{name}为六合卦"]
+    return []
+
+
+def _fu_shen_facts(
+    yao_list: list[dict[str, Any]],
+    lines: dict[int, tuple[str, str, str]],
+    month: str,
+    day: str,
+    kong: tuple[str, ...],
+) -> list[str]:
+    present = {rel[0] for rel in lines.values()}
+    if len(lines) != 6 or present >= KIN_NAMES:
+        return []
+    facts = []
+    for item in yao_list:
+        fu = split_rel_token(item.get(FIELD_FU_SHEN))
+        fei = lines.get(item[FIELD_INDEX])
+        if not fu or not fei or fu[0] in present:
+            continue
+        if element_relation(fei[2], fu[2]) == "生":
+            relation = "飞生伏"
+        elif element_relation(fei[2], fu[2]) == "克":
+            relation = "飞克伏"
+        elif element_relation(fu[2], fei[2]) == "生":
+            relation = "伏生飞"
+        elif element_relation(fu[2], fei[2]) == "克":
+            relation = "伏克飞"
+        else:
+            relation = "飞伏比和"
+        states = [relation]
+        if month:
+            states.append(f"月{season_state(fu[2], BRANCH_WUXING[month])}")
+        if day and is_clash(day, fu[1]):
+            states.append("日冲")
+        if fu[1] in kong:
+            states.append("旬空")
+        facts.append(
+            f"{''.join(fu)}伏于{_pos_name(item[FIELD_INDEX])}{''.join(fei)}之下："
+            + "、".join(states)
+        )
+    return facts
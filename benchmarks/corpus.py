@@ -0,0 +1,172 @@
+"""Seeded generator of synthetic 灵光象吉 charts for benchmarks.
+
+Valid charts are built from the 64-hexagram table with 纳甲 branches, 六亲
+relative to the palace, 六神 from the day stem and 旬空 from each pillar, so
+they pass ``validate``. Layout variants cover what the parser accepts:
+full-width spaces, tabs, short or full 六神 names and every moving marker.
+"""
+
+import random
+
+from ..analysis import BRANCHES, GENERATES, OVERCOMES
+from ..hexagram import HEXAGRAMS_BY_BITS, TRIGRAMS
+from ..parser import BRANCH_WUXING, CHART_HEADER
+
+STEMS = "甲乙丙丁戊己庚辛壬癸"
+# 纳甲: branches of lines 1-3 when the trigram is below, 4-6 when above.
+NAJIA = {
+    "乾": ("子寅辰", "午申戌"),
+    "坎": ("寅辰午", "申戌子"),
+    "艮": ("辰午申", "戌子寅"),
+    "震": ("子寅辰", "午申戌"),
+    "巽": ("丑亥酉", "未巳卯"),
+    "离": ("卯丑亥", "酉未巳"),
+    "坤": ("未巳卯", "丑亥酉"),
+    "兑": ("巳卯丑", "亥酉未"),
+}
+TRIGRAM_BY_BITS = {
+    sum(bit << i for i, bit in enumerate(lines)): name
+    for name, lines in TRIGRAMS.items()
+}
+SIX_GODS = (
+    ("龙", "青龙"),
+    ("雀", "朱雀"),
+    ("勾", "勾陈"),
+    ("蛇", "螣蛇"),
+    ("虎", "白虎"),
+    ("玄", "玄武"),
+)
+# Index into SIX_GODS of the 初爻 god for each day stem.
+FIRST_GOD = dict(zip(STEMS, (0, 0, 1, 1, 2, 3, 4, 4, 5, 5)))
+KIN_SHORT = {"兄弟": "兄", "子孙": "孙", "父母": "父", "妻财": "财", "官鬼": "官"}
+YANG_MARKERS = ("O", "Ｏ", "○")
+YIN_MARKERS = ("X", "Χ", "×")
+QUESTIONS = ("猫猫在哪", "这次面试能否通过", "近期财运如何", "合作能否顺利", "失物能否找回")
+
+
+def najia(bits: int) -> list[str]:
+    lower = TRIGRAM_BY_BITS[bits & 0b111]
+    upper = TRIGRAM_BY_BITS[bits >> 3]
+    return list(NAJIA[lower][0] + NAJIA[upper][1])
+
+
+def kin_of(branch: str, palace_element: str) -> str:
+    element = BRANCH_WUXING[branch]
+    if element == palace_element:
+        return "兄弟"
+    if GENERATES[palace_element] == element:
+        return "子孙"
+    if GENERATES[element] == palace_element:
+        return "父母"
+    if OVERCOMES[palace_element] == element:
+        return "妻财"
+    return "官鬼"
+
+
+def xun_kong(stem: str, branch: str) -> str:
+    start = (BRANCHES.index(branch) - STEMS.index(stem)) % 12
+    return BRANCHES[(start + 10) % 12] + BRANCHES[(start + 11) % 12]
+
+
+def generate_chart(rnd: random.Random) -> str:
+    ben_bits = rnd.randrange(64)
+    moving = rnd.randrange(64) if rnd.random() < 0.85 else 0
+    bian_bits = ben_bits ^ moving
+    ben = HEXAGRAMS_BY_BITS[ben_bits]
+    bian = HEXAGRAMS_BY_BITS[bian_bits]
+    palace_bits = next(
+        h.bits
+        for h in HEXAGRAMS_BY_BITS.values()
+        if h.palace == ben.palace and h.order == 1
+    )
+
+    pillars = []
+    for suffix in "年月日时":
+        cycle = rnd.randrange(60)
+        pillars.append((STEMS[cycle % 10], BRANCHES[cycle % 12], suffix))
+    day_stem = pillars[2][0]
+
+    space = rnd.choice(("     ", "\t", "　　", "  "))
+    full_gods = rnd.random() < 0.3
+    ben_branches = najia(ben_bits)
+    bian_branches = najia(bian_bits)
+    fu_branches = najia(palace_bits)
+    element = ben.palace_element
+
+    rows = []
+    for index in range(6, 0, -1):
+        i = index - 1
+        short_god, full_god = SIX_GODS[(FIRST_GOD[day_stem] + i) % 6]
+        yang = (ben_bits >> i) & 1
+        bian_yang = (bian_bits >> i) & 1
+        marker = ""
+        if (moving >> i) & 1:
+            marker = rnd.choice(YANG_MARKERS if yang else YIN_MARKERS)
+        mark = "世" if index == ben.shi else "应" if index == ben.ying else "　"
+        fu = KIN_SHORT[kin_of(fu_branches[i], element)] + fu_branches[i]
+        ben_token = KIN_SHORT[kin_of(ben_branches[i], element)] + ben_branches[i]
+        bian_token = KIN_SHORT[kin_of(bian_branches[i], element)] + bian_branches[i]
+        rows.append(
+            f"{full_god if full_gods else short_god} {fu} {ben_token} "
+            f"{'—' if yang else '- -'}{marker}{space}{mark} "
+            f"{bian_token} {'—' if bian_yang else '- -'}"
+        )
+
+    month, day = rnd.randint(1, 12), rnd.randint(1, 28)
+    hour, minute = rnd.randrange(24), rnd.randrange(60)
+    header = [
+        CHART_HEADER,
+        f"时间：{rnd.randint(2000, 2099)}年{month:02d}月{day:02d}日 "
+        f"{hour:02d}:{minute:02d}:00",
+        f"占问：{rnd.choice(QUESTIONS)}",
+        " ".join("".join(p) for p in pillars),
+        " ".join(f"{xun_kong(s, b)}空" for s, b, _ in pillars),
+        f"本卦：{ben.name}/{ben.palace}宫·{ben.order}",
+        f"变卦：{bian.name}/{bian.palace}宫·{bian.order}",
+    ]
+    return "\n".join(header + rows) + "\n"
+
+
+def generate_malformed(rnd: random.Random) -> str:
+    lines = generate_chart(rnd).splitlines()
+    kind = rnd.randrange(4)
+    if kind == 0:  # a yao line lost while copying
+        del lines[rnd.randrange(7, len(lines))]
+    elif kind == 1:  # header of another chart
+        lines[5] = f"本卦：{HEXAGRAMS_BY_BITS[rnd.randrange(64)].name}/乾宫·1"
+    elif kind == 2:  # 世/应 marks swapped
+        swap = str.maketrans({"世": "应", "应": "世"})
+        lines = lines[:7] + [line.translate(swap) for line in lines[7:]]
+    else:  # moving line without its changed line
+        i = rnd.randrange(7, len(lines))
+        lines[i] = lines[i].rsplit(" ", 2)[0] + "Χ"
+    return "\n".join(lines) + "\n"
+
+
+def generate_adversarial(rnd: random.Random, size: int = 11900) -> str:
+    """Near-limit input that looks chart-like but keeps the parser busy."""
+    kind = rnd.randrange(3)
+    if kind == 0:  # endless god-prefixed lines that never form a yao line
+        unit = "虎 虎 虎 - - - - - - Χ × ○ 世 应\n"
+    elif kind == 1:  # repeated headers and colons
+        unit = "时间：占问：本卦：变卦：空 年月日时\n"
+    else:  # whitespace-heavy noise around a real chart
+        unit = " \t　" * 20 + "\n"
+    body = unit * (size // len(unit))
+    if kind == 2:
+        body = generate_chart(rnd) + body
+    return body[:size]
+
+
+def generate_corpus(
+    seed: int = 20260217,
+    valid: int = 500,
+    malformed: int = 100,
+    adversarial: int = 20,
+) -> dict[str, list[str]]:
+    rnd = random.Random(seed)
+    return {
+        "valid": [generate_chart(rnd) for _ in range(valid)],
+        "malformed": [generate_malformed(rnd) for _ in range(malformed)],
+        "adversarial": [generate_adversarial(rnd) for _ in range(adversarial)],
+    }
@@ -0,0 +1,342 @@
+"""End-to-end load test of the /liuyao handler with stub provider and sessions.
+
+Run from the plugins directory of an AstrBot checkout (the handler module
+imports AstrBot):
+
+    python -m astrbot_plugin_liuyao.benchmarks.load --users 200 --requests 5
+    python -m astrbot_plugin_liuyao.benchmarks.load --stream --ttft-ms 800
+    python -m astrbot_plugin_liuyao.benchmarks.load --config answer_tier=full
+
+``LiuYaoPlugin.liuyao`` is driven directly with fake events spread over
+``--sessions`` unified_msg_origin values. The provider, persona manager,
+session preferences and KB retriever are replaced by in-process stubs with
+configurable latency, so no LLM is involved. Reports throughput, end-to-end
+p50/p95/p99, event-loop lag and peak RSS (``--trace-memory`` reports peak
+Python allocations instead; it slows the run, so latencies are not
+comparable).
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any
+
+from .. import main as plugin_main
+from .corpus import generate_corpus
+from .micro import _percentile
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ANSWER = (
+    "(1) 卦象概览\n主卦地风升，变卦水风井。\n\n"
+    "(3) 问题解答以及吉凶判断\n吉，所寻之物可得。\n\n"
+)
+
+
+class StubResponse:
+    def __init__(self, text: str, is_chunk: bool = False):
+        self.completion_text = text
+        self.is_chunk = is_chunk
+
+
+class StubMeta:
+    def __init__(self, provider_id: str):
+        self.id = provider_id
+        self.model = "stub"
+
+
+class StubProvider:
+    """Answers after ``ttft_ms`` then ``chunks`` pieces ``chunk_ms`` apart.
+
+    Streams like AstrBot: delta chunks, then one final response with the full
+    (stripped) text.
+    """
+
+    def __init__(
+        self,
+        provider_id: str = "stub",
+        ttft_ms: float = 300.0,
+        chunk_ms: float = 30.0,
+        chunks: int = 20,
+        jitter: float = 0.2,
+        seed: int = 0,
+    ):
+        self.provider_id = provider_id
+        self.ttft_ms = ttft_ms
+        self.chunk_ms = chunk_ms
+        self.chunks = max(1, chunks)
+        self.jitter = jitter
+        self.calls = 0
+        self._rng = random.Random(seed)
+
+    def meta(self) -> StubMeta:
+        return StubMeta(self.provider_id)
+
+    def _delay(self, ms: float) -> float:
+        return ms * (1 + self._rng.uniform(-self.jitter, self.jitter)) / 1000
+
+    def _pieces(self) -> list[str]:
+        size = -(-len(ANSWER) // self.chunks)
+        return [ANSWER[i : i + size] for i in range(0, len(ANSWER), size)]
+
+    async def text_chat(self, prompt: str, system_prompt: str = "", **kwargs):
+        self.calls += 1
+        await asyncio.sleep(
+            self._delay(self.ttft_ms + self.chunk_ms * (self.chunks - 1))
+        )
+        return StubResponse(ANSWER)
+
+    async def text_chat_stream(self, prompt: str, system_prompt: str = "", **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self._delay(self.ttft_ms))
+        for i, piece in enumerate(self._pieces()):
+            if i:
+                await asyncio.sleep(self._delay(self.chunk_ms))
+            yield StubResponse(piece, is_chunk=True)
+        yield StubResponse(ANSWER.strip())
+
+
+class StubPersona:
+    system_prompt = "你是一位说话简洁的占卜师。"
+
+
+class StubPersonaManager:
+    def __init__(self, latency_ms: float):
+        self.latency_ms = latency_ms
+
+    async def get_persona(self, persona_id: str) -> StubPersona:
+        await asyncio.sleep(self.latency_ms / 1000)
+        return StubPersona()
+
+
+class StubContext:
+    def __init__(self, provider: StubProvider, persona_ms: float, stream: bool):
+        self.provider = provider
+        self.persona_manager = StubPersonaManager(persona_ms)
+        self.stream = stream
+
+    def get_using_provider(self, umo: str) -> StubProvider:
+        return self.provider
+
+    def get_provider_by_id(self, provider_id: str) -> StubProvider | None:
+        return None
+
+    def get_config(self, umo: str | None = None) -> dict[str, Any]:
+        return {
+            "provider_settings": {
+                "streaming_response": self.stream,
+                "default_personality": "load",
+            }
+        }
+
+
+class StubPreferences:
+    """Stands in for ``astrbot.api.sp``: no per-session persona override."""
+
+    async def get_async(self, scope: str, scope_id: str, key: str, default: Any):
+        return default
+
+
+class FakeEvent:
+    def __init__(self, message_str: str, umo: str, sender_id: str):
+        self.message_str = message_str
+        self.unified_msg_origin = umo
+        self.sender_id = sender_id
+        self.sent = 0
+
+    def plain_result(self, text: str) -> str:
+        return text
+
+    async def send(self, result: str) -> None:
+        self.sent += 1
+
+    def get_sender_id(self) -> str:
+        return self.sender_id
+
+    def is_admin(self) -> bool:
+        return False
+
+
+def _stub_kb(latency_ms: float):
+    async def retrieve_knowledge_base(query: str, umo: str, context: Any) -> str:
+        await asyncio.sleep(latency_ms / 1000)
+        return f"{query}：卦辞（示例）"
+
+    return retrieve_knowledge_base
+
+
+async def _watch_loop_lag(interval: float, lags: list[float]) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append((loop.time() - start - interval) * 1000)
+
+
+async def run_load(args: argparse.Namespace) -> dict[str, Any]:
+    rng = random.Random(args.seed)
+    charts = generate_corpus(
+        seed=args.seed, valid=args.charts, malformed=0, adversarial=0
+    )
+    charts = charts["valid"]
+    provider = StubProvider(
+        ttft_ms=args.ttft_ms,
+        chunk_ms=args.chunk_ms,
+        chunks=args.chunks,
+        jitter=args.jitter,
+        seed=args.seed,
+    )
+    config: dict[str, Any] = {"store_enabled": False}
+    config.update(args.config)
+    plugin = plugin_main.LiuYaoPlugin(
+        StubContext(provider, args.persona_ms, args.stream), config
+    )
+    await plugin.initialize()
+
+    latencies: list[float] = []
+    lags: list[float] = []
+    replies = Counter()
+
+    async def request(event: FakeEvent) -> None:
+        start = time.perf_counter()
+        async for _ in plugin.liuyao(event):
+            pass
+        latencies.append((time.perf_counter() - start) * 1000)
+        replies["sent_sections"] += event.sent
+
+    async def user(i: int) -> None:
+        umo = f"load:GroupMessage:{i % args.sessions}"
+        sender = f"user{i}"
+        for _ in range(args.requests):
+            text = f"/liuyao {rng.choice(charts)}"
+            await request(FakeEvent(text, umo, sender))
+            if rng.random() < args.more:
+                await request(FakeEvent("/liuyao more", umo, sender))
+            if args.think_ms:
+                await asyncio.sleep(rng.expovariate(1000 / args.think_ms))
+
+    saved = plugin_main.sp, plugin_main.retrieve_knowledge_base
+    plugin_main.sp = StubPreferences()
+    plugin_main.retrieve_knowledge_base = _stub_kb(args.kb_ms)
+    if args.trace_memory:
+        tracemalloc.start()
+    watcher = asyncio.create_task(_watch_loop_lag(args.lag_interval_ms / 1000, lags))
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(user(i) for i in range(args.users)))
+    finally:
+        elapsed = time.perf_counter() - start
+        watcher.cancel()
+        if args.trace_memory:
+            memory = {"peak_traced_mb": tracemalloc.get_traced_memory()[1] / 2**20}
+            tracemalloc.stop()
+        elif resource is not None:
+            # ru_maxrss is in KiB on Linux.
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            memory = {"peak_rss_mb": rss / 1024}
+        else:
+            memory = {}
+        plugin_main.sp, plugin_main.retrieve_knowledge_base = saved
+        await plugin.terminate()
+
+    latencies.sort()
+    lags.sort()
+    snapshot = plugin._metrics.snapshot()
+    return {
+        "users": args.users,
+        "sessions": args.sessions,
+        "requests": len(latencies),
+        "provider_calls": provider.calls,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50), 1),
+            "p95": round(_percentile(latencies, 95), 1),
+            "p99": round(_percentile(latencies, 99), 1),
+            "max": round(latencies[-1], 1) if latencies else 0.0,
+        },
+        "loop_lag_ms": {
+            "p50": round(_percentile(lags, 50), 2),
+            "p99": round(_percentile(lags, 99), 2),
+            "max": round(lags[-1], 2) if lags else 0.0,
+        },
+        "memory": {name: round(mb, 1) for name, mb in memory.items()},
+        "sent_sections": replies["sent_sections"],
+        "counters": snapshot["counters"],
+        "stages_ms": {
+            stage: {"p50": row["p50"], "p99": row["p99"]}
+            for stage, row in snapshot["stages_ms"].items()
+        },
+    }
+
+
+def _config_pair(text: str) -> tuple[str, Any]:
+    key, _, value = text.partition("=")
+    try:
+        return key, json.loads(value)
+    except json.JSONDecodeError:
+        return key, value
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--users", type=int, default=100, help="concurrent users")
+    ap.add_argument("--sessions", type=int, default=20, help="distinct umo values")
+    ap.add_argument("--requests", type=int, default=5, help="charts per user")
+    ap.add_argument("--charts", type=int, default=200, help="distinct charts")
+    ap.add_argument("--more", type=float, default=0.0, help="P(/liuyao more)")
+    ap.add_argument("--think-ms", type=float, default=0.0)
+    ap.add_argument("--stream", action="store_true")
+    ap.add_argument("--ttft-ms", type=float, default=300.0)
+    ap.add_argument("--chunk-ms", type=float, default=30.0)
+    ap.add_argument("--chunks", type=int, default=20)
+    ap.add_argument("--jitter", type=float, default=0.2)
+    ap.add_argument("--persona-ms", type=float, default=5.0)
+    ap.add_argument("--kb-ms", type=float, default=50.0)
+    ap.add_argument("--lag-interval-ms", type=float, default=10.0)
+    ap.add_argument("--seed", type=int, default=20260217)
+    ap.add_argument(
+        "--config",
+        type=_config_pair,
+        nargs="*",
+        default=[],
+        metavar="KEY=VALUE",
+        help="plugin config overrides (values parsed as JSON when possible)",
+    )
+    ap.add_argument("--trace-memory", action="store_true", help="use tracemalloc")
+    ap.add_argument("--json", action="store_true", help="print the raw report")
+    args = ap.parse_args()
+    args.config = dict(args.config)
+
+    report = asyncio.run(run_load(args))
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    lat, lag = report["latency_ms"], report["loop_lag_ms"]
+    print(
+        f"{report['requests']} requests from {report['users']} users over "
+        f"{report['sessions']} sessions in {report['elapsed_s']}s "
+        f"({report['throughput_per_s']}/s), provider calls {report['provider_calls']}"
+    )
+    print(
+        f"end-to-end ms  p50 {lat['p50']}  p95 {lat['p95']}  "
+        f"p99 {lat['p99']}  max {lat['max']}"
+    )
+    print(f"loop lag ms    p50 {lag['p50']}  p99 {lag['p99']}  max {lag['max']}")
+    for name, mb in report["memory"].items():
+        print(f"{name:<14} {mb}")
+    for stage, row in report["stages_ms"].items():
+        print(f"  {stage:<13} p50 {row['p50']:>9}  p99 {row['p99']:>9}")
+    for name, n in report["counters"].items():
+        print(f"  {name}: {n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Microbenchmarks for the parse -> validate -> prompt hot path.
+
+Run from the plugins directory:
+
+    python -m astrbot_plugin_liuyao.benchmarks.micro            # report
+    python -m astrbot_plugin_liuyao.benchmarks.micro --save     # new baseline
+    python -m astrbot_plugin_liuyao.benchmarks.micro --check    # fail on regression
+
+Latency percentiles come from timing every call individually; peak memory is
+measured in a separate tracemalloc pass so it does not skew the timings.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from ..parser import LiuYaoParser
+from ..prompt import _sanitize_prompt_payload, build_user_prompt
+from ..validator import validate
+from .corpus import generate_corpus
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+
+def _cases(corpus: dict[str, list[str]]) -> dict[str, tuple[Callable, list[Any]]]:
+    parsed_valid = [LiuYaoParser.parse(text) for text in corpus["valid"]]
+    parsed_all = [
+        LiuYaoParser.parse(text) for texts in corpus.values() for text in texts
+    ]
+    return {
+        "parse/valid": (LiuYaoParser.parse, corpus["valid"]),
+        "parse/malformed": (LiuYaoParser.parse, corpus["malformed"]),
+        "parse/adversarial": (LiuYaoParser.parse, corpus["adversarial"]),
+        "validate": (validate, parsed_all),
+        "build_user_prompt/json": (build_user_prompt, parsed_valid),
+        "build_user_prompt/compact": (
+            lambda parsed: build_user_prompt(parsed, "compact"),
+            parsed_valid,
+        ),
+        "_sanitize_prompt_payload": (_sanitize_prompt_payload, parsed_valid),
+    }
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[k]
+
+
+def run_case(func: Callable, inputs: list[Any], rounds: int) -> dict[str, float]:
+    for item in inputs[:20]:
+        func(item)  # warm-up
+    samples = []
+    perf_counter_ns = time.perf_counter_ns
+    for _ in range(rounds):
+        for item in inputs:
+            start = perf_counter_ns()
+            func(item)
+            samples.append(perf_counter_ns() - start)
+    samples.sort()
+    total_s = sum(samples) / 1e9
+
+    tracemalloc.start()
+    for item in inputs:
+        func(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "calls": len(samples),
+        "throughput_per_s": round(len(samples) / total_s, 1) if total_s else 0.0,
+        "mean_us": round(statistics.fmean(samples) / 1e3, 2),
+        "p50_us": round(_percentile(samples, 50) / 1e3, 2),
+        "p95_us": round(_percentile(samples, 95) / 1e3, 2),
+        "p99_us": round(_percentile(samples, 99) / 1e3, 2),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run(seed: int, rounds: int) -> dict[str, dict[str, float]]:
+    corpus = generate_corpus(seed=seed)
+    return {
+        name: run_case(func, inputs, rounds)
+        for name, (func, inputs) in _cases(corpus).items()
+    }
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+) -> list[str]:
+    regressions = []
+    for name, row in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in ("p50_us", "p95_us"):
+            if base[metric] and row[metric] > base[metric] * tolerance:
+                regressions.append(
+                    f"{name} {metric}: {row[metric]} > {base[metric]} x {tolerance}"
+                )
+    return regressions
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--seed", type=int, default=20260217)
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    ap.add_argument("--save", action="store_true", help="write results as baseline")
+    ap.add_argument("--check", action="store_true", help="exit 1 on regression")
+    ap.add_argument("--tolerance", type=float, default=1.5)
+    args = ap.parse_args()
+
+    results = run(args.seed, args.rounds)
+    header = f"{'case':<28}{'ops/s':>10}{'p50 us':>9}{'p95 us':>9}{'p99 us':>9}"
+    print(header + f"{'peak KB':>9}")
+    for name, row in results.items():
+        print(
+            f"{name:<28}{row['throughput_per_s']:>10.0f}{row['p50_us']:>9.1f}"
+            f"{row['p95_us']:>9.1f}{row['p99_us']:>9.1f}{row['peak_kb']:>9.1f}"
+        )
+
+    if args.save:
+        payload = {"seed": args.seed, "rounds": args.rounds, "results": results}
+        args.baseline.write_text(
+            json.dumps(payload, ensure_ascii=False, indent=2) + "\n",
+            encoding="utf-8",
+        )
+        print(f"baseline written to {args.baseline}")
+
+    if args.check:
+        if not args.baseline.exists():
+            sys.exit(f"no baseline at {args.baseline}; run with --save first")
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print("no regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Memory and allocations of parsed-chart dicts versus ``PackedChart``.
+
+Run from the plugins directory:
+
+    python -m astrbot_plugin_liuyao.benchmarks.packed_bench [--charts 1000]
+"""
+
+import argparse
+import tracemalloc
+
+from ..packed import pack
+from ..parser import LiuYaoParser
+from .parse_bench import SAMPLE
+
+
+def measure(build, count: int) -> tuple[int, int]:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = [build(i) for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    size = sum(stat.size_diff for stat in stats)
+    blocks = sum(stat.count_diff for stat in stats)
+    del kept
+    return size, blocks
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--charts", type=int, default=1000)
+    args = ap.parse_args()
+
+    # Distinct questions so nothing is shared between charts.
+    texts = [SAMPLE.replace("猫猫在哪", f"猫猫在哪{i}") for i in range(args.charts)]
+    parsed = [LiuYaoParser.parse(text) for text in texts]
+    rows = {
+        "dict": measure(lambda i: LiuYaoParser.parse(texts[i]), args.charts),
+        # raw line strings are shared with ``parsed`` and not counted here.
+        "PackedChart": measure(lambda i: pack(parsed[i]), args.charts),
+        "to_compact()": measure(lambda i: pack(parsed[i]).to_compact(), args.charts),
+    }
+    print(f"{'form':<18}{'bytes/chart':>14}{'blocks/chart':>14}")
+    for name, (size, blocks) in rows.items():
+        print(f"{name:<18}{size / args.charts:>14.0f}{blocks / args.charts:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
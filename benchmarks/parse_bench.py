@@ -0,0 +1,66 @@
+"""Per-chart parse cost of ``LiuYaoParser`` against the original implementation.
+
+Run from the plugins directory:
+
+    python -m astrbot_plugin_liuyao.benchmarks.parse_bench [--number 2000]
+"""
+
+import argparse
+import timeit
+
+from ..parser import LiuYaoParser
+from .legacy_parser import LiuYaoParser as LegacyLiuYaoParser
+
+SAMPLE = """灵光象吉·六爻排盘
+时间：2026年02月17日 18:11:37
+占问：猫猫在哪
+丙午年 庚寅月 壬戌日 己酉时
+寅卯空 午未空 子丑空 寅卯空
+本卦：地风升/震宫·5
+变卦：水风井/震宫·6
+虎 财戌 官酉 - -     　 父子 - -
+蛇 官申 父亥 - -Χ 　 财戌 —
+勾 孙午 财丑 - -     世 官申 - -
+雀 财辰 官酉 —     　 官酉 —
+龙 兄寅 父亥 —     　 父亥 —
+玄 父子 财丑 - -     应 财丑 - -
+"""
+
+_LINES = SAMPLE.splitlines()
+
+CASES = {
+    "sample": SAMPLE,
+    "tabs_fullwidth": SAMPLE.replace("     ", "\t").replace(" ", "　"),
+    "padded": "\n\n".join("  " + line + "  " for line in SAMPLE.splitlines()),
+    "noise_10k": SAMPLE + ("占问补充说明 " * 40 + "\n") * 36,
+    "headers_last": "\n".join(_LINES[:1] + _LINES[7:] + _LINES[1:7]) + "\n",
+}
+
+
+def bench(number: int) -> list[tuple[str, float, float]]:
+    rows = []
+    for name, text in CASES.items():
+        if LiuYaoParser.parse(text) != LegacyLiuYaoParser.parse(text):
+            raise SystemExit(f"output mismatch on case {name!r}")
+        old = _best(lambda: LegacyLiuYaoParser.parse(text), number)
+        new = _best(lambda: LiuYaoParser.parse(text), number)
+        rows.append((name, old / number * 1e6, new / number * 1e6))
+    return rows
+
+
+def _best(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--number", type=int, default=2000)
+    args = ap.parse_args()
+
+    print(f"{'case':<16}{'legacy us':>12}{'current us':>12}{'speedup':>10}")
+    for name, old_us, new_us in bench(args.number):
+        print(f"{name:<16}{old_us:>12.1f}{new_us:>12.1f}{old_us / new_us:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""Bulk parse + validate of archived charts, one JSONL result per chart.
+
+Run from the plugins directory (AstrBot itself is not needed):
+
+    python -m astrbot_plugin_liuyao.cli charts.txt -o results.jsonl
+    python -m astrbot_plugin_liuyao.cli archive.jsonl --field text -o new.jsonl
+    python -m astrbot_plugin_liuyao.cli archive.jsonl -o new.jsonl --compare old.jsonl
+
+Text input holds charts back to back, split on the 灵光象吉 title line like a
+multi-chart message. JSONL input has one chart per line, either a JSON string
+or an object whose ``--field`` holds the text (``id`` is carried over when
+present). Charts are streamed in chunks through a process pool, so memory
+stays flat and output keeps input order. Aggregate statistics go to stderr.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, TextIO
+
+from .hexagram import lookup_hexagram
+from .keys import BASE_INFO_KEY
+from .parser import iter_charts
+from .worker import ParseResult, parse_and_validate_many
+
+INPUT_FORMATS = ("auto", "txt", "jsonl")
+# Chunks queued per worker; bounds memory while keeping every worker busy.
+PIPELINE_DEPTH = 2
+
+Record = tuple[Any, str | None, str]  # (id, raw text or None, input error)
+
+
+def iter_text_charts(lines: Iterable[str]) -> Iterator[Record]:
+    """Charts of a text file, split like a multi-chart ``/liuyao`` message."""
+    for n, text in enumerate(iter_charts(lines), start=1):
+        yield n, text, ""
+
+
+def iter_jsonl_charts(lines: Iterable[str], field: str) -> Iterator[Record]:
+    for lineno, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield lineno, None, f"invalid JSON: {exc.msg}"
+            continue
+        if isinstance(item, str):
+            yield lineno, item, ""
+        elif isinstance(item, dict) and isinstance(item.get(field), str):
+            yield item.get("id", lineno), item[field], ""
+        else:
+            yield lineno, None, f"missing text field {field!r}"
+
+
+def iter_chunks(records: Iterable[Record], size: int) -> Iterator[list[Record]]:
+    chunk: list[Record] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Summary:
+    """Aggregate counts over all results."""
+
+    def __init__(self, top: int = 20):
+        self.top = top
+        self.total = 0
+        self.ok = 0
+        self.input_errors = 0
+        self.error_codes: Counter[str] = Counter()
+        self.hexagrams: Counter[str] = Counter()
+        self.palaces: Counter[str] = Counter()
+        self.changed: list[Any] = []
+        self.compared = 0
+
+    def add(self, row: dict[str, Any]) -> None:
+        self.total += 1
+        if "input_error" in row:
+            self.input_errors += 1
+            return
+        if row["ok"]:
+            self.ok += 1
+        self.error_codes.update({err["code"] for err in row["errors"]})
+        if row["hexagram"]:
+            self.hexagrams[row["hexagram"]] += 1
+        if row["palace"]:
+            self.palaces[row["palace"]] += 1
+
+    def compare(self, row: dict[str, Any], previous: dict[Any, tuple]) -> None:
+        before = previous.get(_id_key(row["id"]))
+        if before is None:
+            return
+        self.compared += 1
+        if before != _outcome(row):
+            self.changed.append(row["id"])
+
+    def to_dict(self, elapsed: float) -> dict[str, Any]:
+        report = {
+            "charts": self.total,
+            "ok": self.ok,
+            "invalid": self.total - self.ok - self.input_errors,
+            "input_errors": self.input_errors,
+            "elapsed_s": round(elapsed, 2),
+            "charts_per_s": round(self.total / elapsed, 1) if elapsed else 0.0,
+            "error_codes": _ranked(self.error_codes),
+            "hexagrams": _ranked(self.hexagrams, self.top),
+            "distinct_hexagrams": len(self.hexagrams),
+            "palaces": _ranked(self.palaces),
+        }
+        if self.compared:
+            report["compared"] = self.compared
+            report["changed"] = len(self.changed)
+            report["changed_ids"] = self.changed[: self.top]
+        return report
+
+
+def result_row(
+    chart_id: Any, result: ParseResult, include_parsed: bool = True
+) -> dict[str, Any]:
+    parsed, ok, errors = result
+    base = parsed.get(BASE_INFO_KEY) or {}
+    hexagram = lookup_hexagram(base.get("主卦"))
+    row = {
+        "id": chart_id,
+        "ok": ok,
+        "errors": errors,
+        "hexagram": hexagram.name if hexagram else base.get("主卦") or "",
+        "palace": hexagram.palace if hexagram else "",
+    }
+    if include_parsed:
+        row["parsed"] = parsed
+    return row
+
+
+def load_outcomes(path: str) -> dict[Any, tuple]:
+    """``id -> (ok, error codes)`` of an earlier run, for ``--compare``."""
+    outcomes = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                if "input_error" not in row:
+                    outcomes[_id_key(row["id"])] = _outcome(row)
+    return outcomes
+
+
+def _ranked(counts: Counter[str], limit: int | None = None) -> dict[str, int]:
+    """Most common first, ties by name, so reports diff cleanly."""
+    ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    return dict(ranked[:limit])
+
+
+def _outcome(row: dict[str, Any]) -> tuple:
+    return row["ok"], tuple(sorted({err["code"] for err in row["errors"]}))
+
+
+def _id_key(chart_id: Any) -> str:
+    return json.dumps(chart_id, ensure_ascii=False)
+
+
+def run(
+    records: Iterable[Record],
+    out: TextIO,
+    workers: int,
+    chunk_size: int,
+    include_parsed: bool = True,
+    previous: dict[Any, tuple] | None = None,
+    top: int = 20,
+    check_calendar: bool = False,
+) -> Summary:
+    summary = Summary(top)
+
+    def emit(chunk: list[Record], results: list[ParseResult]) -> None:
+        it = iter(results)
+        for chart_id, text, input_error in chunk:
+            if text is None:
+                row = {"id": chart_id, "ok": False, "input_error": input_error}
+            else:
+                row = result_row(chart_id, next(it), include_parsed)
+                if previous:
+                    summary.compare(row, previous)
+            summary.add(row)
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def texts_of(chunk: list[Record]) -> list[str]:
+        return [text for _, text, _ in chunk if text is not None]
+
+    chunks = iter_chunks(records, chunk_size)
+    if workers <= 0:
+        for chunk in chunks:
+            emit(chunk, parse_and_validate_many(texts_of(chunk), check_calendar))
+        return summary
+    pending: deque[tuple[list[Record], Future]] = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in chunks:
+            future = pool.submit(
+                parse_and_validate_many, texts_of(chunk), check_calendar
+            )
+            pending.append((chunk, future))
+            if len(pending) >= workers * PIPELINE_DEPTH:
+                done_chunk, future = pending.popleft()
+                emit(done_chunk, future.result())
+        while pending:
+            done_chunk, future = pending.popleft()
+            emit(done_chunk, future.result())
+    return summary
+
+
+def format_summary(report: dict[str, Any]) -> str:
+    lines = [
+        f"{report['charts']} charts in {report['elapsed_s']}s "
+        f"({report['charts_per_s']}/s): {report['ok']} ok, "
+        f"{report['invalid']} invalid, {report['input_errors']} unreadable"
+    ]
+    if report["error_codes"]:
+        lines.append("error codes:")
+        lines.extend(f"  {code}: {n}" for code, n in report["error_codes"].items())
+    if report["palaces"]:
+        lines.append("palaces:")
+        lines.extend(f"  {name}宫: {n}" for name, n in report["palaces"].items())
+    if report["hexagrams"]:
+        lines.append(
+            f"hexagrams ({report['distinct_hexagrams']} distinct, most common):"
+        )
+        lines.extend(f"  {name}: {n}" for name, n in report["hexagrams"].items())
+    if "changed" in report:
+        lines.append(
+            f"changed vs previous run: {report['changed']} of {report['compared']}"
+        )
+        if report["changed_ids"]:
+            ids = ", ".join(str(i) for i in report["changed_ids"])
+            lines.append(f"  ids: {ids}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("input", help="chart file (.txt or .jsonl), - for stdin")
+    ap.add_argument("-o", "--output", default="-", help="JSONL output (- = stdout)")
+    ap.add_argument("--format", choices=INPUT_FORMATS, default="auto")
+    ap.add_argument("--field", default="raw", help="text field of JSONL objects")
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="worker processes (0 = run in this process)",
+    )
+    ap.add_argument("--chunk-size", type=int, default=256)
+    ap.add_argument("--no-parsed", action="store_true", help="omit parse output")
+    ap.add_argument(
+        "--check-calendar",
+        action="store_true",
+        help="also check 四柱 against 起卦时间 (E403)",
+    )
+    ap.add_argument("--compare", metavar="JSONL", help="earlier output to diff")
+    ap.add_argument("--top", type=int, default=20, help="hexagrams/ids listed")
+    ap.add_argument("--stats-json", action="store_true", help="JSON statistics")
+    args = ap.parse_args(argv)
+
+    fmt = args.format
+    if fmt == "auto":
+        fmt = "jsonl" if args.input.endswith((".jsonl", ".ndjson")) else "txt"
+    previous = load_outcomes(args.compare) if args.compare else None
+
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        if fmt == "jsonl":
+            records = iter_jsonl_charts(src, args.field)
+        else:
+            records = iter_text_charts(src)
+        summary = run(
+            records,
+            out,
+            workers=args.workers,
+            chunk_size=max(1, args.chunk_size),
+            include_parsed=not args.no_parsed,
+            previous=previous,
+            top=args.top,
+            check_calendar=args.check_calendar,
+        )
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+    report = summary.to_dict(time.perf_counter() - start)
+    if args.stats_json:
+        print(json.dumps(report, ensure_ascii=False, indent=2), file=sys.stderr)
+    else:
+        print(format_summary(report), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
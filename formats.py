@@ -0,0 +1,68 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from .parser import CHART_HEADER, LiuYaoParser, iter_lines
+
+# Only the first few non-blank lines are looked up, so a short remark pasted
+# above the chart does not hide its title.
+SIGNATURE_LINES = 3
+
+
+@dataclass(frozen=True, slots=True)
+class ChartFormat:
+    """A 排盘 text layout and the parser turning it into the shared schema.
+
+    ``signatures`` are title or marker lines (whitespace ignored) that
+    identify the layout; ``parse`` must return the ``基础信息``/``爻象数据``
+    dict produced by :class:`LiuYaoParser`.
+    """
+
+    name: str
+    signatures: tuple[str, ...]
+    parse: Callable[[str], dict[str, Any]]
+
+
+FORMATS: dict[str, ChartFormat] = {}
+_SIGNATURE_INDEX: dict[str, ChartFormat] = {}
+_default_format: ChartFormat | None = None
+
+
+def _signature_key(line: str) -> str:
+    return "".join(line.split())
+
+
+def register_format(fmt: ChartFormat, default: bool = False) -> None:
+    global _default_format
+    for signature in fmt.signatures:
+        key = _signature_key(signature)
+        owner = _SIGNATURE_INDEX.get(key)
+        if owner is not None and owner.name != fmt.name:
+            raise ValueError(f"signature {signature!r} already used by {owner.name}")
+        _SIGNATURE_INDEX[key] = fmt
+    FORMATS[fmt.name] = fmt
+    if default or _default_format is None:
+        _default_format = fmt
+
+
+def detect_format(raw_text: str) -> ChartFormat:
+    """Format whose signature matches one of the first lines, else the default."""
+    for i, (_, line) in enumerate(iter_lines(raw_text or "")):
+        fmt = _SIGNATURE_INDEX.get(_signature_key(line))
+        if fmt is not None:
+            return fmt
+        if i + 1 >= SIGNATURE_LINES:
+            break
+    return _default_format
+
+
+def parse_chart(raw_text: str) -> dict[str, Any]:
+    return detect_format(raw_text).parse(raw_text)
+
+
+# 灵光象吉 is the reference layout and also handles unsigned text (a chart
+# pasted without its title line).
+register_format(
+    ChartFormat(name="lingguang", signatures=(CHART_HEADER,), parse=LiuYaoParser.parse),
+    default=True,
+)
@@ -0,0 +1,116 @@
+import re
+from datetime import date, datetime
+
+STEMS = "甲乙丙丁戊己庚辛壬癸"
+BRANCHES = "子丑寅卯辰巳午未申酉戌亥"
+PILLAR_NAMES = "年月日时"
+
+# The 60-甲子 cycle: index i is STEMS[i % 10] + BRANCHES[i % 12].
+JIAZI = tuple(STEMS[i % 10] + BRANCHES[i % 12] for i in range(60))
+JIAZI_INDEX = {name: i for i, name in enumerate(JIAZI)}
+# 旬空 per 甲子 index: the two branches left over by its 旬 (甲子旬 -> 戌亥).
+XUN_KONG = tuple(
+    BRANCHES[(i - i % 10 + 10) % 12] + BRANCHES[(i - i % 10 + 11) % 12]
+    for i in range(60)
+)
+
+PILLAR_PATTERN = re.compile(r"([甲乙丙丁戊己庚辛壬癸][子丑寅卯辰巳午未申酉戌亥])([年月日时])")
+KONG_PATTERN = re.compile(r"([子丑寅卯辰巳午未申酉戌亥]{2})空")
+CAST_TIME_PATTERN = re.compile(
+    r"(\d{4})\D+(\d{1,2})\D+(\d{1,2})\D*?(?:(\d{1,2}):(\d{2})(?::(\d{2}))?)?\s*$"
+)
+
+# 节 starting each month: C of the 21st-century formula
+# day = int(Y * 0.2422 + C) - L, by Gregorian month (小寒 in January ... 大雪
+# in December). The month branch from the 节 of Gregorian month m on is
+# BRANCHES[m % 12], so 立春 opens 寅 month.
+JIE_C = (5.4055, 3.87, 5.63, 4.81, 5.52, 5.678, 7.108, 7.5, 7.646, 8.318, 7.438, 7.18)
+JIE_D = 0.2422
+JIE_YEARS = range(2000, 2100)
+# The formula can be a day off in some years, so dates this close to a 节
+# are left unchecked.
+JIE_TOLERANCE_DAYS = 1
+DAY_REFERENCE = date(2000, 1, 1)  # 戊午日
+DAY_REFERENCE_INDEX = JIAZI_INDEX["戊午"]
+
+
+def parse_pillars(text: str | None) -> dict[str, int]:
+    """'丙午年 庚寅月 壬戌日 己酉时' -> {'年': 42, '月': 26, '日': 58, '时': 45}.
+
+    Stem/branch pairs outside the cycle (e.g. 甲丑) are left out.
+    """
+    pillars = {}
+    for m in PILLAR_PATTERN.finditer(text or ""):
+        index = JIAZI_INDEX.get(m.group(1))
+        if index is not None:
+            pillars.setdefault(m.group(2), index)
+    return pillars
+
+
+def parse_kong(text: str | None) -> list[str]:
+    """Branch pairs of 空亡_raw in pillar order, e.g. ['寅卯', '午未', ...]."""
+    return KONG_PATTERN.findall(text or "")
+
+
+def xun_kong(index: int) -> str:
+    return XUN_KONG[index]
+
+
+def parse_cast_time(text: str | None) -> datetime | None:
+    """'2026年02月17日 18:11:37' -> datetime; None without a full date and time."""
+    m = CAST_TIME_PATTERN.search((text or "").strip())
+    if not m or m.group(4) is None:
+        return None
+    year, month, day, hour, minute, second = m.groups()
+    try:
+        return datetime(
+            int(year), int(month), int(day), int(hour), int(minute), int(second or 0)
+        )
+    except ValueError:
+        return None
+
+
+def jie_day(year: int, month: int) -> int:
+    """Day of ``month`` on which its 节 falls (valid for ``JIE_YEARS``)."""
+    y = year % 100
+    leaps = (y - 1) // 4 if month <= 2 else y // 4
+    return int(y * JIE_D + JIE_C[month - 1]) - leaps
+
+
+def cycle_index(stem: int, branch: int) -> int:
+    """甲子 index of a stem/branch pair of equal parity."""
+    return (6 * stem - 5 * branch) % 60
+
+
+def calendar_pillars(moment: datetime) -> dict[str, int]:
+    """四柱 of ``moment`` as 甲子 indexes.
+
+    Pillars that cannot be fixed reliably are omitted: year and month outside
+    ``JIE_YEARS`` or next to a 节, and day and hour in the 23 o'clock 子时
+    (schools differ on whether the day has already changed).
+    """
+    pillars: dict[str, int] = {}
+    if moment.hour != 23:
+        days = moment.toordinal() - DAY_REFERENCE.toordinal()
+        day = (DAY_REFERENCE_INDEX + days) % 60
+        hour_branch = (moment.hour + 1) // 2 % 12
+        # 五鼠遁: 子 hour's stem follows from the day stem.
+        pillars["日"] = day
+        pillars["时"] = cycle_index((day % 10 * 2 + hour_branch) % 10, hour_branch)
+
+    year, month = moment.year, moment.month
+    if year not in JIE_YEARS:
+        return pillars
+    jie = jie_day(year, month)
+    if abs(moment.day - jie) <= JIE_TOLERANCE_DAYS:
+        return pillars
+    branch = month % 12 if moment.day > jie else (month - 1) % 12
+    # The 干支 year turns at 立春, which opens 寅 month.
+    if month < 2 or (month == 2 and branch != 2):
+        year -= 1
+    year_index = (year - 4) % 60
+    # 五虎遁: 寅 month's stem follows from the year stem.
+    month_stem = (year_index % 10 * 2 + 2 + (branch - 2) % 12) % 10
+    pillars["年"] = year_index
+    pillars["月"] = cycle_index(month_stem, branch)
+    return pillars
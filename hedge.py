@@ -0,0 +1,76 @@
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from typing import TypeVar
+
+T = TypeVar("T")
+PieceSource = Callable[[], AsyncIterator[T]]
+
+
+class FirstPieceTimeout(Exception):
+    """No source produced any output within the first-piece deadline."""
+
+
+async def first_piece(
+    primary: PieceSource[T],
+    secondary: PieceSource[T] | None = None,
+    hedge_after: float = 0.0,
+    timeout: float = 0.0,
+) -> tuple[int, T, AsyncIterator[T]] | None:
+    """Race response sources to their first piece (sources skip empty output).
+
+    ``primary`` starts at once; ``secondary`` starts when the primary has not
+    produced anything after ``hedge_after`` seconds, or as soon as it fails or
+    ends empty. Returns ``(index, first_piece, rest)`` of the winner (0 for
+    primary, 1 for secondary); the loser is cancelled. Returns None if every
+    source ended without output, re-raises the last error if every source
+    failed, and raises FirstPieceTimeout after ``timeout`` seconds (0 = none).
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    sources = [primary] if secondary is None else [primary, secondary]
+    racing: dict[asyncio.Future, tuple[int, AsyncIterator[T]]] = {}
+    error: BaseException | None = None
+
+    def launch(index: int) -> None:
+        pieces = sources[index]()
+        racing[asyncio.ensure_future(anext(pieces))] = (index, pieces)
+
+    launch(0)
+    launched = 1
+    try:
+        while racing:
+            elapsed = loop.time() - started
+            waits = []
+            if launched < len(sources):
+                waits.append(hedge_after - elapsed)
+            if timeout:
+                waits.append(timeout - elapsed)
+            done, _ = await asyncio.wait(
+                racing,
+                timeout=max(0.0, min(waits)) if waits else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for fut in done:
+                index, pieces = racing.pop(fut)
+                try:
+                    return index, fut.result(), pieces
+                except StopAsyncIteration:
+                    pass
+                except Exception as exc:
+                    error = exc
+            elapsed = loop.time() - started
+            if launched < len(sources) and (not racing or elapsed >= hedge_after):
+                launch(launched)
+                launched += 1
+            elif timeout and elapsed >= timeout and racing:
+                raise FirstPieceTimeout(f"no output after {timeout:g}s")
+    finally:
+        for fut in racing:
+            fut.cancel()
+        if racing:
+            await asyncio.gather(*racing, return_exceptions=True)
+            for _, pieces in racing.values():
+                await pieces.aclose()
+    if error is not None:
+        raise error
+    return None
@@ -0,0 +1,157 @@
+from dataclasses import dataclass
+from typing import Any
+
+from .keys import FIELD_BEN_YINYANG, FIELD_BIAN_YINYANG, FIELD_INDEX, FIELD_MOVING
+
+# Trigram lines from bottom to top, 1 = yang.
+TRIGRAMS = {
+    "乾": (1, 1, 1),
+    "兑": (1, 1, 0),
+    "离": (1, 0, 1),
+    "震": (1, 0, 0),
+    "巽": (0, 1, 1),
+    "坎": (0, 1, 0),
+    "艮": (0, 0, 1),
+    "坤": (0, 0, 0),
+}
+
+PALACE_ELEMENTS = {
+    "乾": "金",
+    "兑": "金",
+    "离": "火",
+    "震": "木",
+    "巽": "木",
+    "坎": "水",
+    "艮": "土",
+    "坤": "土",
+}
+
+# 京房八宫: 本宫, 一世 .. 五世, 游魂, 归魂.
+PALACE_HEXAGRAMS = {
+    "乾": ("乾为天", "天风姤", "天山遁", "天地否", "风地观", "山地剥", "火地晋", "火天大有"),
+    "坎": ("坎为水", "水泽节", "水雷屯", "水火既济", "泽火革", "雷火丰", "地火明夷", "地水师"),
+    "艮": ("艮为山", "山火贲", "山天大畜", "山泽损", "火泽睽", "天泽履", "风泽中孚", "风山渐"),
+    "震": ("震为雷", "雷地豫", "雷水解", "雷风恒", "地风升", "水风井", "泽风大过", "泽雷随"),
+    "巽": ("巽为风", "风天小畜", "风火家人", "风雷益", "天雷无妄", "火雷噬嗑", "山雷颐", "山风蛊"),
+    "离": ("离为火", "火山旅", "火风鼎", "火水未济", "山水蒙", "风水涣", "天水讼", "天火同人"),
+    "坤": ("坤为地", "地雷复", "地泽临", "地天泰", "雷天大壮", "泽天夬", "水天需", "水地比"),
+    "兑": ("兑为泽", "泽水困", "泽地萃", "泽山咸", "水山蹇", "地山谦", "雷山小过", "雷泽归妹"),
+}
+
+# Variant and traditional characters found in hexagram names (天山遯, 乾為天).
+NAME_VARIANTS = str.maketrans(
+    "遯為離兌澤風觀剝晉濟豐師賁損漸恆過隨無頤蠱渙訟復臨壯謙歸",
+    "遁为离兑泽风观剥晋济丰师贲损渐恒过随无颐蛊涣讼复临壮谦归",
+)
+
+# 世爻 position for each of the eight hexagrams of a palace.
+SHI_POSITIONS = (6, 1, 2, 3, 4, 5, 4, 3)
+
+
+@dataclass(frozen=True, slots=True)
+class Hexagram:
+    name: str
+    short_name: str
+    palace: str
+    palace_element: str
+    order: int
+    shi: int
+    ying: int
+    bits: int
+
+
+def _palace_patterns(palace: str) -> list[tuple[int, ...]]:
+    lower = list(TRIGRAMS[palace])
+    lines = lower + lower
+    patterns = [tuple(lines)]
+    for pos in range(5):  # 一世 .. 五世: flip lines 1..5 cumulatively
+        lines[pos] ^= 1
+        patterns.append(tuple(lines))
+    lines[3] ^= 1  # 游魂: fourth line back
+    patterns.append(tuple(lines))
+    lines[0:3] = lower  # 归魂: lower trigram restored
+    patterns.append(tuple(lines))
+    return patterns
+
+
+def _short_name(name: str) -> str:
+    return name[0] if name[1] == "为" else name[2:]
+
+
+def _build_index() -> tuple[dict[int, Hexagram], dict[str, Hexagram]]:
+    by_bits: dict[int, Hexagram] = {}
+    by_name: dict[str, Hexagram] = {}
+    for palace, names in PALACE_HEXAGRAMS.items():
+        for order, (name, pattern) in enumerate(
+            zip(names, _palace_patterns(palace)), start=1
+        ):
+            shi = SHI_POSITIONS[order - 1]
+            hexagram = Hexagram(
+                name=name,
+                short_name=_short_name(name),
+                palace=palace,
+                palace_element=PALACE_ELEMENTS[palace],
+                order=order,
+                shi=shi,
+                ying=shi - 3 if shi > 3 else shi + 3,
+                bits=sum(bit << i for i, bit in enumerate(pattern)),
+            )
+            by_bits[hexagram.bits] = hexagram
+            by_name[hexagram.name] = hexagram
+            by_name[hexagram.short_name] = hexagram
+    return by_bits, by_name
+
+
+# Indexed by the 6-bit pattern: bit 0 is 初爻, bit 5 is 上爻, 1 = yang.
+HEXAGRAMS_BY_BITS, HEXAGRAMS_BY_NAME = _build_index()
+
+
+def lookup_hexagram(name: str | None) -> Hexagram | None:
+    if not name:
+        return None
+    return HEXAGRAMS_BY_NAME.get("".join(name.split()).translate(NAME_VARIANTS))
+
+
+def lines_to_bits(yao_list: list[Any], field: str = FIELD_BEN_YINYANG) -> int | None:
+    """6-bit pattern of ``field`` (阳/阴) over lines 1..6, or None if incomplete."""
+    bits = 0
+    seen = 0
+    for item in yao_list:
+        if not isinstance(item, dict):
+            return None
+        index = item.get(FIELD_INDEX)
+        value = item.get(field)
+        if not isinstance(index, int) or not 1 <= index <= 6:
+            return None
+        if value == "阳":
+            bits |= 1 << (index - 1)
+        elif value != "阴":
+            return None
+        seen |= 1 << (index - 1)
+    return bits if seen == 0b111111 else None
+
+
+def changed_bits(yao_list: list[Any]) -> int | None:
+    """Pattern of the 变卦: the printed 变卦爻阴阳 if complete, else ben ^ moving."""
+    bits = lines_to_bits(yao_list, FIELD_BIAN_YINYANG)
+    if bits is not None:
+        return bits
+    ben = lines_to_bits(yao_list)
+    if ben is None:
+        return None
+    moving = 0
+    for item in yao_list:
+        if item.get(FIELD_MOVING):
+            moving |= 1 << (item[FIELD_INDEX] - 1)
+    return ben ^ moving
+
+
+def derive_hexagrams(
+    yao_list: list[Any],
+) -> tuple[Hexagram | None, Hexagram | None]:
+    ben = lines_to_bits(yao_list)
+    bian = changed_bits(yao_list)
+    return (
+        HEXAGRAMS_BY_BITS.get(ben) if ben is not None else None,
+        HEXAGRAMS_BY_BITS.get(bian) if bian is not None else None,
+    )
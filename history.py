@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+from typing import Any
+
+from .hexagram import PALACE_HEXAGRAMS, lookup_hexagram
+from .keys import BASE_INFO_KEY
+from .packed import pack
+from .store import normalize_cast_time
+
+QUESTION_PREVIEW_LEN = 20
+
+
+@dataclass(slots=True)
+class HistoryQuery:
+    entry_id: int = 0
+    hexagram: str = ""
+    palace: str = ""
+    before_id: int = 0
+    unknown: str = ""
+
+    @property
+    def label(self) -> str:
+        if self.hexagram:
+            return self.hexagram
+        if self.palace:
+            return f"{self.palace}宫"
+        return ""
+
+
+def parse_history_args(text: str) -> HistoryQuery:
+    """``#12`` views one entry, ``@12`` pages after id 12, anything else filters.
+
+    A filter is a hexagram name (full or short, e.g. 地风升 / 升) or a palace
+    with the 宫 suffix (e.g. 震宫).
+    """
+    query = HistoryQuery()
+    for token in text.split():
+        if token[0] in "#＃" and token[1:].isdecimal():
+            query.entry_id = int(token[1:])
+        elif token[0] in "@＠" and token[1:].isdecimal():
+            query.before_id = int(token[1:])
+        elif token.endswith("宫") and token[:-1] in PALACE_HEXAGRAMS:
+            query.palace = token[:-1]
+        elif hexagram := lookup_hexagram(token):
+            query.hexagram = hexagram.name
+        else:
+            query.unknown = token
+    return query
+
+
+def history_row(parsed_json: dict[str, Any]) -> dict[str, str]:
+    """Indexed columns of a history row for a validated chart."""
+    base = parsed_json.get(BASE_INFO_KEY) or {}
+    packed = pack(parsed_json)
+    ben = lookup_hexagram(base.get("主卦"))
+    bian = lookup_hexagram(base.get("变卦"))
+    return {
+        "chart_key": packed.digest(),
+        "hexagram": ben.name if ben else (base.get("主卦") or ""),
+        "bian_hexagram": bian.name if bian else (base.get("变卦") or ""),
+        "palace": ben.palace if ben else (base.get("所属宫位") or "").rstrip("宫"),
+        "cast_at": normalize_cast_time(base.get("起卦时间")),
+        "question": base.get("占问事由") or "",
+        "chart": packed.to_compact(),
+    }
+
+
+def format_history_page(
+    rows: list[dict[str, Any]], query: HistoryQuery, limit: int
+) -> str:
+    label = f"（{query.label}）" if query.label else ""
+    if not rows:
+        if query.before_id:
+            return f"历史记录{label}没有更多了。"
+        return f"暂无历史记录{label}。成功解卦后会自动记录。"
+    lines = [f"六爻历史记录{label}"]
+    for row in rows:
+        change = ""
+        if row["bian_hexagram"] and row["bian_hexagram"] != row["hexagram"]:
+            change = f"→{row['bian_hexagram']}"
+        question = row["question"]
+        if len(question) > QUESTION_PREVIEW_LEN:
+            question = question[:QUESTION_PREVIEW_LEN] + "…"
+        lines.append(
+            f"#{row['id']} {row['cast_at'][:16]} {row['hexagram']}{change}"
+            f"（{row['palace']}宫） {question}"
+        )
+    lines.append("查看详情：/liuyao history #编号")
+    if len(rows) >= limit:
+        args = " ".join(filter(None, (query.label, f"@{rows[-1]['id']}")))
+        lines.append(f"下一页：/liuyao history {args}")
+    return "\n".join(lines)
+
+
+def format_history_entry(entry: dict[str, Any]) -> str:
+    change = ""
+    if entry["bian_hexagram"] and entry["bian_hexagram"] != entry["hexagram"]:
+        change = f" 之 {entry['bian_hexagram']}"
+    header = [
+        f"【历史 #{entry['id']}】{entry['hexagram']}{change}（{entry['palace']}宫）",
+        f"起卦时间：{entry['cast_at']}",
+    ]
+    if entry["question"]:
+        header.append(f"占问：{entry['question']}")
+    return "\n".join(header) + "\n\n" + entry["text"]
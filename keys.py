@@ -2,7 +2,14 @@ BASE_INFO_KEY = "基础信息"
 YAO_DATA_KEY = "爻象数据"
 ERRORS_KEY = "errors"
 
+BASE_INFO_FIELDS = ("占问事由", "起卦时间", "四柱", "空亡_raw", "主卦", "变卦", "所属宫位")
+
 FIELD_INDEX = "index"
 FIELD_MOVING = "动爻"
+FIELD_FU_SHEN = "伏神"
+FIELD_BEN_YAO = "本卦爻"
+FIELD_BEN_YINYANG = "本卦爻阴阳"
+FIELD_SHI_YING = "世应"
 FIELD_BIAN_YAO = "变卦爻"
 FIELD_BIAN_YINYANG = "变卦爻阴阳"
+FIELD_RAW = "raw"
@@ -1,33 +1,175 @@
+import asyncio
 import json
+import logging
 import re
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
 from typing import Any
 
 from astrbot.api import logger, sp
 from astrbot.api.event import AstrMessageEvent, filter
-from astrbot.api.star import Context, Star
+from astrbot.api.star import Context, Star, StarTools
 from astrbot.core.astr_main_agent_resources import retrieve_knowledge_base
 
+from .analysis import analyze_chart, format_facts, format_rules_summary
+from .cache import TTLCache
+from .hedge import FirstPieceTimeout, first_piece
+from .history import (
+    format_history_entry,
+    format_history_page,
+    history_row,
+    parse_history_args,
+)
 from .keys import ERRORS_KEY
-from .parser import LiuYaoParser
-from .prompt import build_system_prompt, build_user_prompt
-from .validator import format_errors, validate
+from .metrics import Metrics, RequestTrace, format_stats
+from .packed import pack
+from .parser import split_charts
+from .prompt import (
+    ANSWER_TIERS,
+    MORE_INSTRUCTION,
+    PROMPT_ENCODINGS,
+    build_kb_query,
+    build_system_prompt,
+    build_user_prompt,
+    prompt_size,
+    with_answer_tier,
+    with_kb_context,
+)
+from .scheduler import FairScheduler, SchedulerBusy
+from .singleflight import SingleFlight
+from .store import InterpretationStore
+from .stream import StreamAssembler
+from .validator import format_errors
+from .worker import ParseExecutor
 
 MAX_RAW_TEXT_LEN = 12000
+PLUGIN_NAME = "astrbot_plugin_liuyao"
+STORE_FILENAME = "liuyao.db"
 COMMAND_PATTERN = re.compile(r"^/liuyao(?:\s+|$)", flags=re.IGNORECASE)
+SUBCOMMAND_PATTERN = re.compile(
+    r"^(rules|stats|history|more)(?:\s+|$)", flags=re.IGNORECASE
+)
+PERSONA_COMMAND_PATTERN = re.compile(r"^\s*/?persona\b", flags=re.IGNORECASE)
+BUSY_MESSAGE = "当前解卦请求较多，排队已满，请稍后再试。"
+AI_FAILED_MESSAGE = "排盘解析成功，但 AI 解卦失败。请检查模型配置后重试。"
+MORE_HINT = "以上为简要结论。发送 /liuyao more 查看推演过程与趋吉避凶建议。"
+NO_FOLLOWUP_MESSAGE = "没有可继续展开的解卦，请先发送 /liuyao + 排盘。"
+
+
+@dataclass(slots=True)
+class Interpretation:
+    """Answer to one chart and the prompts, as sent, that produced it."""
+
+    text: str | None
+    system_prompt: str = ""
+    user_prompt: str = ""
+    cache_key: str = ""
+
+
+@dataclass(slots=True)
+class FollowUp:
+    """What ``/liuyao more`` needs to continue a brief answer.
+
+    ``user_prompt`` is the first turn exactly as sent (KB text and tier
+    instruction included), so the continuation replays it unchanged.
+    """
+
+    parsed: dict[str, Any]
+    system_prompt: str
+    user_prompt: str
+    answer: str
+    cache_key: str
+    more: str = ""
 
 
 class LiuYaoPlugin(Star):
     def __init__(self, context: Context, config: dict | None = None):
         super().__init__(context)
         self.config = config or {}
+        self._interp_cache = TTLCache(
+            max_entries=self._cfg_int("cache_max_entries", 256),
+            ttl_seconds=self._cfg_int("cache_ttl_seconds", 3600),
+            max_bytes=self._cfg_int("cache_max_memory_kb", 4096) * 1024,
+        )
+        prompt_ttl = self._cfg_int("prompt_cache_ttl_seconds", 60)
+        self._session_prompt_cache = TTLCache(max_entries=1024, ttl_seconds=prompt_ttl)
+        self._persona_prompt_cache = TTLCache(max_entries=128, ttl_seconds=prompt_ttl)
+        self._kb_cache = TTLCache(
+            max_entries=self._cfg_int("kb_cache_max_entries", 512),
+            ttl_seconds=self._cfg_int("kb_cache_ttl_seconds", 1800),
+        )
+        self._prompt_usage: dict[str, Any] = {
+            "requests": 0,
+            **{
+                name: {"requests": 0, "chars": 0, "tokens": 0}
+                for name in PROMPT_ENCODINGS
+            },
+        }
+        self._parse_executor = ParseExecutor(
+            mode=self._cfg_str("parse_pool_mode", "thread").strip().lower(),
+            max_workers=self._cfg_int("parse_pool_size", 2),
+            offload_threshold=self._cfg_int("parse_offload_threshold", 2000),
+            check_calendar=self._cfg_bool("calendar_check", False),
+        )
+        self._metrics = Metrics()
+        self._inflight = SingleFlight()
+        self._scheduler = FairScheduler(
+            max_concurrent=self._cfg_int("provider_max_concurrent", 8),
+            per_session=self._cfg_int("provider_session_quota", 2),
+            max_queue=self._cfg_int("provider_queue_size", 64),
+        )
+        self._store: InterpretationStore | None = None
+        self._followups = TTLCache(
+            max_entries=1024,
+            ttl_seconds=self._cfg_int("followup_ttl_seconds", 1800),
+        )
 
     async def initialize(self) -> None:
+        if self._cfg_bool("store_enabled", True):
+            await self._open_store()
         logger.info("astrbot_plugin_liuyao loaded")
 
+    async def _open_store(self) -> None:
+        try:
+            path = StarTools.get_data_dir(PLUGIN_NAME) / STORE_FILENAME
+            store = InterpretationStore(
+                path,
+                max_entries=self._cfg_int("store_max_entries", 5000),
+                max_age_days=self._cfg_int("store_max_age_days", 30),
+                history_per_user=self._cfg_int("history_max_per_user", 2000),
+            )
+            await asyncio.to_thread(store.open)
+            warm = await asyncio.to_thread(
+                store.load_recent, self._cfg_int("store_warm_entries", 256)
+            )
+        except Exception as exc:
+            logger.error(f"Open liuyao store failed: {exc!s}")
+            return
+        self._store = store
+        # Oldest first, so the most recently read entries end up hottest.
+        for key, text in reversed(warm):
+            self._interp_cache.put(key, text)
+        logger.info(f"Liuyao store opened: {path} ({len(warm)} entries warmed)")
+
     @filter.command("liuyao")
     async def liuyao(self, event: AstrMessageEvent):
         """解析灵光象吉六爻排盘并调用 AI 生成解卦文本"""
-        raw_text = self._extract_raw_text(event.message_str)
+        trace = self._metrics.trace()
+        with trace.span("extract"):
+            raw_text = self._extract_raw_text(event.message_str)
+            subcommand, raw_text = self._split_subcommand(raw_text)
+        if subcommand == "stats":
+            yield event.plain_result(await self._stats_text(event))
+            return
+        if subcommand == "history":
+            yield event.plain_result(await self._history_text(event, raw_text))
+            return
+        if subcommand == "more":
+            async for result in self._liuyao_more(event, trace):
+                yield result
+            return
+        rules_only = subcommand == "rules" or self._cfg_bool("rules_only", False)
         if not raw_text:
             yield event.plain_result(
                 "插件已加载。请在同一条消息中发送 `/liuyao` + 六爻排盘纯文本。",
@@ -39,86 +181,658 @@ class LiuYaoPlugin(Star):
             )
             return
 
-        parsed = LiuYaoParser.parse(raw_text)
-        ok, errors = validate(parsed)
+        charts = split_charts(raw_text)
+        if len(charts) > 1:
+            async for result in self._liuyao_batch(event, charts, rules_only, trace):
+                yield result
+            self._finish_trace(trace, "batch")
+            return
+
+        timings: dict[str, float] = {}
+        parsed, ok, errors = await self._parse_executor.run(raw_text, timings)
+        for stage, ms in timings.items():
+            trace.record(stage, ms)
         if not ok:
+            self._count_validation_errors(errors)
+            self._finish_trace(trace, "invalid")
             yield event.plain_result(format_errors(errors))
             if self._cfg_bool("debug", False):
-                parsed_debug = dict(parsed)
-                parsed_debug[ERRORS_KEY] = errors
-                yield event.plain_result(
-                    "解析 JSON（debug）:\n"
-                    + json.dumps(parsed_debug, ensure_ascii=False, indent=2),
-                )
+                yield event.plain_result(self._debug_json(parsed, errors))
+            return
+
+        if rules_only:
+            summary = format_rules_summary(parsed, analyze_chart(parsed))
+            self._finish_trace(trace, "rules")
+            yield event.plain_result(summary)
             return
 
-        result_text = await self._ask_ai_for_interpretation(event, parsed)
+        delivered: list[str] = []
+
+        async def send_section(text: str) -> None:
+            delivered.append(text)
+            await event.send(event.plain_result(text))
+
+        tier = self._answer_tier()
+        trace.fields["tier"] = tier
+        try:
+            answer = await self._ask_ai_for_interpretation(
+                event,
+                parsed,
+                on_section=send_section,
+                on_queued=self._queue_notifier(event),
+                trace=trace,
+                tier=tier,
+            )
+        except SchedulerBusy:
+            self._finish_trace(trace, "busy")
+            yield event.plain_result(BUSY_MESSAGE)
+            return
+        result_text = answer.text
+        self._finish_trace(trace, "ok" if result_text else "ai_failed")
         if not result_text:
+            yield event.plain_result(AI_FAILED_MESSAGE)
+            return
+        self._record_history(event, parsed, result_text)
+
+        if not delivered:
+            yield event.plain_result(result_text)
+        if tier == "brief":
+            self._followups.put(
+                self._followup_key(event),
+                FollowUp(
+                    parsed=parsed,
+                    system_prompt=answer.system_prompt,
+                    user_prompt=answer.user_prompt,
+                    answer=result_text,
+                    cache_key=answer.cache_key,
+                ),
+            )
+            yield event.plain_result(MORE_HINT)
+        if self._cfg_bool("debug", False):
+            yield event.plain_result(self._debug_json(parsed))
             yield event.plain_result(
-                "排盘解析成功，但 AI 解卦失败。请检查模型配置后重试。",
+                "解卦缓存（debug）:\n"
+                + json.dumps(self._interp_cache.stats(), ensure_ascii=False)
+                + "\n提示词用量累计（估算）:\n"
+                + json.dumps(self._prompt_usage, ensure_ascii=False),
             )
+
+    async def _liuyao_more(self, event: AstrMessageEvent, trace: RequestTrace):
+        """Continue the last brief answer of this sender in this session."""
+        ctx: FollowUp | None = self._followups.get(self._followup_key(event))
+        if ctx is None:
+            self._finish_trace(trace, "more_missing")
+            yield event.plain_result(NO_FOLLOWUP_MESSAGE)
             return
+        delivered: list[str] = []
 
-        yield event.plain_result(result_text)
-        if self._cfg_bool("debug", False):
+        async def send_section(text: str) -> None:
+            delivered.append(text)
+            await event.send(event.plain_result(text))
+
+        if not ctx.more:
+            try:
+                ctx.more = (
+                    await self._continue_interpretation(event, ctx, trace, send_section)
+                    or ""
+                )
+            except SchedulerBusy:
+                self._finish_trace(trace, "busy")
+                yield event.plain_result(BUSY_MESSAGE)
+                return
+            if not ctx.more:
+                self._finish_trace(trace, "ai_failed")
+                yield event.plain_result(AI_FAILED_MESSAGE)
+                return
+            # The history entry grows into the full answer.
+            self._record_history(event, ctx.parsed, f"{ctx.answer}\n\n{ctx.more}")
+        self._finish_trace(trace, "more")
+        if not delivered:
+            yield event.plain_result(ctx.more)
+
+    async def _continue_interpretation(
+        self,
+        event: AstrMessageEvent,
+        ctx: FollowUp,
+        trace: RequestTrace,
+        on_section: Callable[[str], Awaitable[None]] | None = None,
+    ) -> str | None:
+        """Second turn on top of the stored first one: no parsing, KB lookup or
+        prompt building, and the replayed prefix is what the provider saw."""
+        umo = event.unified_msg_origin
+        provider = self.context.get_using_provider(umo)
+        if not provider:
+            logger.error("No provider configured for current session.")
+            self._metrics.incr("ai.no_provider")
+            return None
+        more_key = f"{ctx.cache_key}:more"
+        use_cache = self._cfg_bool("cache_enabled", True)
+        if use_cache:
+            cached = self._interp_cache.get(more_key)
+            if cached:
+                trace.fields["cache_hit"] = True
+                self._metrics.incr("cache.interp_hit")
+                return cached
+        contexts = [
+            {"role": "user", "content": ctx.user_prompt},
+            {"role": "assistant", "content": ctx.answer},
+        ]
+        return await self._inflight.do(
+            more_key,
+            lambda: self._generate(
+                umo=umo,
+                provider=provider,
+                cfg=self.context.get_config(umo=umo),
+                user_prompt=MORE_INSTRUCTION,
+                system_prompt=ctx.system_prompt,
+                on_section=on_section,
+                on_queued=self._queue_notifier(event),
+                trace=trace,
+                cache_key=more_key if use_cache else "",
+                chart=pack(ctx.parsed).to_compact(),
+                contexts=contexts,
+            ),
+        )
+
+    @filter.event_message_type(filter.EventMessageType.ALL)
+    async def on_persona_command(self, event: AstrMessageEvent):
+        """会话切换人格时使已缓存的系统提示词失效"""
+        if PERSONA_COMMAND_PATTERN.match(event.message_str or ""):
+            self._session_prompt_cache.pop(event.unified_msg_origin)
+
+    async def _liuyao_batch(
+        self,
+        event: AstrMessageEvent,
+        charts: list[str],
+        rules_only: bool = False,
+        trace: RequestTrace | None = None,
+    ):
+        max_charts = max(1, self._cfg_int("batch_max_charts", 10))
+        if len(charts) > max_charts:
             yield event.plain_result(
-                "解析 JSON（debug）:\n"
-                + json.dumps(parsed, ensure_ascii=False, indent=2),
+                f"单条消息最多包含 {max_charts} 个排盘，当前为 {len(charts)} 个。",
             )
+            return
+
+        debug = self._cfg_bool("debug", False)
+        semaphore = asyncio.Semaphore(max(1, self._cfg_int("batch_concurrency", 3)))
+
+        async def interpret(parsed: dict[str, Any]) -> str | None:
+            async with semaphore:
+                answer = await self._ask_ai_for_interpretation(
+                    event, parsed, trace=trace
+                )
+                return answer.text
+
+        jobs: list[
+            tuple[dict[str, Any], list[dict[str, str]], asyncio.Task | None]
+        ] = []
+        start = time.perf_counter()
+        results = await self._parse_executor.run_many(charts)
+        if trace is not None:
+            trace.record("parse", (time.perf_counter() - start) * 1000)
+            trace.fields["charts"] = len(charts)
+        for parsed, ok, errors in results:
+            if not ok:
+                self._count_validation_errors(errors)
+            task = None
+            if ok and not rules_only:
+                task = asyncio.create_task(interpret(parsed))
+            jobs.append((parsed, errors, task))
+
+        # Results are delivered in input order; later charts keep running
+        # while earlier ones are being sent.
+        total = len(jobs)
+        try:
+            for i, (parsed, errors, task) in enumerate(jobs, start=1):
+                title = f"【第 {i}/{total} 卦】"
+                if rules_only and not errors:
+                    summary = format_rules_summary(parsed, analyze_chart(parsed))
+                    yield event.plain_result(f"{title}\n{summary}")
+                    continue
+                if task is None:
+                    yield event.plain_result(f"{title}\n{format_errors(errors)}")
+                    if debug:
+                        yield event.plain_result(self._debug_json(parsed, errors))
+                    continue
+                try:
+                    result_text = await task
+                except SchedulerBusy:
+                    yield event.plain_result(f"{title}\n{BUSY_MESSAGE}")
+                    continue
+                if not result_text:
+                    yield event.plain_result(f"{title}\n{AI_FAILED_MESSAGE}")
+                    continue
+                self._record_history(event, parsed, result_text)
+                yield event.plain_result(f"{title}\n{result_text}")
+                if debug:
+                    yield event.plain_result(self._debug_json(parsed))
+        finally:
+            for _, _, task in jobs:
+                if task is not None and not task.done():
+                    task.cancel()
 
     async def terminate(self) -> None:
+        self._parse_executor.shutdown()
+        if self._store is not None:
+            await asyncio.to_thread(self._store.close)
+            self._store = None
         logger.info("astrbot_plugin_liuyao terminated")
 
     async def _ask_ai_for_interpretation(
         self,
         event: AstrMessageEvent,
         parsed_json: dict[str, Any],
-    ) -> str | None:
-        provider = self.context.get_using_provider(event.unified_msg_origin)
+        on_section: Callable[[str], Awaitable[None]] | None = None,
+        on_queued: Callable[[int], Awaitable[None]] | None = None,
+        trace: RequestTrace | None = None,
+        tier: str = "full",
+    ) -> Interpretation:
+        """Interpret one chart; raises SchedulerBusy when the queue is full."""
+        trace = trace or self._metrics.trace()
+        umo = event.unified_msg_origin
+        provider = self.context.get_using_provider(umo)
         if not provider:
             logger.error("No provider configured for current session.")
-            return None
+            self._metrics.incr("ai.no_provider")
+            return Interpretation(None)
+
+        cfg = self.context.get_config(umo=umo)
+        encoding = self._cfg_str("prompt_encoding", "json").strip().lower()
+        if encoding not in PROMPT_ENCODINGS:
+            encoding = "json"
+        with trace.span("prompt_build"):
+            facts = ""
+            if self._cfg_bool("rule_facts", True):
+                facts = format_facts(analyze_chart(parsed_json))
+            user_prompt = build_user_prompt(parsed_json, encoding, facts)
+            self._record_prompt_usage(parsed_json, encoding, facts, user_prompt)
+            max_chars = self._cfg_int("brief_max_chars", 300)
+            user_prompt = with_answer_tier(user_prompt, tier, max_chars)
+
+        async def resolve_kb() -> str | None:
+            with trace.span("kb"):
+                return await self._resolve_kb_context(
+                    event, build_kb_query(parsed_json)
+                )
+
+        # KB retrieval does not depend on the persona, so it runs while the
+        # system prompt is being resolved.
+        kb_task = asyncio.create_task(resolve_kb())
+        delivering = True
+
+        async def deliver(section: str) -> None:
+            # A waiter that gave up stops receiving sections of the shared call.
+            if delivering:
+                await on_section(section)
+
+        try:
+            with trace.span("persona"):
+                persona_prompt, system_prompt = await self._resolve_system_prompt(
+                    event, cfg, encoding
+                )
+            # KB selection is per session and the answer is grounded in it, so
+            # the retrieved text is part of the cache key.
+            kb_context = await kb_task
+        finally:
+            if not kb_task.done():
+                kb_task.cancel()
 
-        user_prompt = build_user_prompt(parsed_json)
-        persona_prompt = await self._resolve_persona_prompt(event)
-        system_prompt = build_system_prompt(
-            persona_prompt=persona_prompt,
-            custom_system_prompt=self._cfg_str("custom_system_prompt", ""),
+        use_cache = self._cfg_bool("cache_enabled", True)
+        packed = pack(parsed_json)
+        answer = Interpretation(
+            None,
+            system_prompt=system_prompt,
+            # KB text goes into the user message so the system prompt stays a
+            # stable, cacheable prefix.
+            user_prompt=with_kb_context(user_prompt, kb_context),
+            cache_key=packed.digest(
+                system_prompt,
+                persona_prompt,
+                self._provider_id(provider),
+                encoding,
+                facts,
+                f"brief:{max_chars}" if tier == "brief" else tier,
+                kb_context or "",
+            ),
         )
-        kb_context = await self._resolve_kb_context(event, user_prompt)
-        if kb_context:
-            system_prompt += f"\n\n[Related Knowledge Base Results]\n{kb_context}"
+        cache_key = answer.cache_key
+        if use_cache:
+            cached = self._interp_cache.get(cache_key)
+            if cached:
+                logger.debug(f"Liuyao interpretation cache hit: {cache_key}")
+                trace.fields["cache_hit"] = True
+                self._metrics.incr("cache.interp_hit")
+                answer.text = cached
+                return answer
+            if self._store is not None:
+                stored = await asyncio.to_thread(self._store.get, cache_key)
+                if stored:
+                    trace.fields["cache_hit"] = "store"
+                    self._metrics.incr("cache.store_hit")
+                    self._interp_cache.put(cache_key, stored)
+                    answer.text = stored
+                    return answer
 
+        if cache_key in self._inflight:
+            # The same chart and prompt is already being interpreted (e.g. a
+            # forwarded message); wait for that call instead of another.
+            logger.debug(f"Liuyao interpretation joined in-flight: {cache_key}")
+            trace.fields["shared"] = True
+            self._metrics.incr("singleflight.shared")
         try:
-            cfg = self.context.get_config(umo=event.unified_msg_origin)
-            use_stream = bool(
-                cfg.get("provider_settings", {}).get("streaming_response", False),
-            )
-            if use_stream:
-                final_text = ""
-                async for chunk in provider.text_chat_stream(
-                    prompt=user_prompt,
+            answer.text = await self._inflight.do(
+                cache_key,
+                lambda: self._generate(
+                    umo=umo,
+                    provider=provider,
+                    cfg=cfg,
+                    user_prompt=answer.user_prompt,
                     system_prompt=system_prompt,
-                ):
-                    text = (chunk.completion_text or "").strip()
-                    if text:
-                        final_text = self._merge_stream_text(final_text, text)
-                return final_text or None
+                    on_section=deliver if on_section else None,
+                    on_queued=on_queued,
+                    trace=trace,
+                    cache_key=cache_key if use_cache else "",
+                    chart=packed.to_compact(),
+                ),
+            )
+        finally:
+            delivering = False
+        return answer
 
-            resp = await provider.text_chat(
-                prompt=user_prompt,
-                system_prompt=system_prompt,
+    async def _generate(
+        self,
+        *,
+        umo: str,
+        provider: Any,
+        cfg: dict[str, Any],
+        user_prompt: str,
+        system_prompt: str,
+        on_section: Callable[[str], Awaitable[None]] | None,
+        on_queued: Callable[[int], Awaitable[None]] | None,
+        trace: RequestTrace,
+        cache_key: str,
+        chart: str,
+        contexts: list[dict[str, str]] | None = None,
+    ) -> str | None:
+        """One provider call, shared by every waiter on the same fingerprint."""
+        async with self._scheduler.slot(umo, on_queued) as wait_ms:
+            trace.record("queue", wait_ms)
+            result_text = await self._call_provider(
+                provider, cfg, user_prompt, system_prompt, on_section, trace, contexts
             )
-            return (resp.completion_text or "").strip() or None
+        if cache_key and result_text:
+            self._interp_cache.put(cache_key, result_text)
+            if self._store is not None:
+                self._store.put(cache_key, chart, result_text)
+        return result_text
+
+    async def _call_provider(
+        self,
+        provider: Any,
+        cfg: dict[str, Any],
+        user_prompt: str,
+        system_prompt: str,
+        on_section: Callable[[str], Awaitable[None]] | None,
+        trace: RequestTrace,
+        contexts: list[dict[str, str]] | None = None,
+    ) -> str | None:
+        llm_start = time.perf_counter()
+        request: dict[str, Any] = {
+            "prompt": user_prompt,
+            "system_prompt": system_prompt,
+        }
+        if contexts:
+            request["contexts"] = contexts
+        use_stream = bool(
+            cfg.get("provider_settings", {}).get("streaming_response", False),
+        )
+        deadline = self._cfg_int("provider_timeout_seconds", 180)
+        try:
+            result_text = await asyncio.wait_for(
+                self._run_provider(
+                    provider, request, use_stream, on_section, trace, llm_start
+                ),
+                timeout=deadline if deadline > 0 else None,
+            )
+        except (asyncio.TimeoutError, FirstPieceTimeout) as exc:
+            stage = "ttft" if isinstance(exc, FirstPieceTimeout) else "total"
+            logger.error(f"Liuyao AI request timed out ({stage} deadline)")
+            self._metrics.incr(f"ai.timeout.{stage}")
+            return None
         except Exception as exc:
             logger.error(f"Liuyao AI request failed: {exc!s}")
+            self._metrics.incr("ai.failures")
             return None
+        trace.record("llm", (time.perf_counter() - llm_start) * 1000)
+        if not result_text:
+            self._metrics.incr("ai.empty")
+        return result_text
+
+    async def _run_provider(
+        self,
+        provider: Any,
+        request: dict[str, Any],
+        use_stream: bool,
+        on_section: Callable[[str], Awaitable[None]] | None,
+        trace: RequestTrace,
+        llm_start: float,
+    ) -> str | None:
+        """Wait for the first output (hedging if configured), then the rest.
+
+        Only the winning provider's output reaches ``on_section``.
+        """
+        secondary = self._hedge_provider(provider)
+        sources = [
+            lambda p=p: self._provider_pieces(p, request, use_stream)
+            for p in (provider, secondary)
+            if p is not None
+        ]
+        # Without streaming the first piece is the whole answer, so only the
+        # total deadline applies.
+        ttft_deadline = self._cfg_int("provider_ttft_timeout_seconds", 30)
+        first = await first_piece(
+            *sources,
+            hedge_after=self._cfg_int("hedge_after_ms", 8000) / 1000,
+            timeout=ttft_deadline if use_stream and ttft_deadline > 0 else 0,
+        )
+        if first is None:
+            return None
+        winner, (text, final), pieces = first
+        if secondary is not None:
+            trace.fields["hedge"] = "secondary" if winner else "primary"
+            self._metrics.incr(f"ai.hedge_won.{trace.fields['hedge']}")
+        if not use_stream:
+            return text
+
+        trace.record("ttft", (time.perf_counter() - llm_start) * 1000)
+        # Without a section callback (e.g. batch mode) the stream is only
+        # accumulated.
+        delivery = self._cfg_str("stream_delivery", "section").strip().lower()
+        assembler = StreamAssembler(delivery if on_section else "off")
+        piece: tuple[str, bool] | None = (text, final)
+        try:
+            while piece is not None:
+                text, final = piece
+                sections = assembler.finish(text) if final else assembler.feed(text)
+                for section in sections:
+                    await on_section(section)
+                piece = await anext(pieces, None)
+        finally:
+            await pieces.aclose()
+        tail = assembler.flush()
+        if tail:
+            await on_section(tail)
+        return assembler.text() or None
+
+    @staticmethod
+    async def _provider_pieces(
+        provider: Any, request: dict[str, Any], use_stream: bool
+    ) -> AsyncIterator[tuple[str, bool]]:
+        """``(text, final)`` of one provider response, skipping empty text.
+
+        Stream chunks are deltas; the closing non-chunk response carries the
+        full answer.
+        """
+        if use_stream:
+            async for chunk in provider.text_chat_stream(**request):
+                if chunk.completion_text:
+                    yield chunk.completion_text, not chunk.is_chunk
+            return
+        resp = await provider.text_chat(**request)
+        text = (resp.completion_text or "").strip()
+        if text:
+            yield text, True
+
+    def _hedge_provider(self, primary: Any) -> Any | None:
+        provider_id = self._cfg_str("hedge_provider_id", "").strip()
+        if not provider_id:
+            return None
+        try:
+            provider = self.context.get_provider_by_id(provider_id)
+        except Exception as exc:
+            logger.error(f"Resolve hedge provider failed({provider_id}): {exc!s}")
+            return None
+        if provider is None or provider is primary:
+            return None
+        return provider
+
+    def _queue_notifier(
+        self, event: AstrMessageEvent
+    ) -> Callable[[int], Awaitable[None]]:
+        async def notify_queued(position: int) -> None:
+            await event.send(
+                event.plain_result(
+                    f"当前解卦请求较多，已进入排队（第 {position} 位），轮到后自动开始。"
+                ),
+            )
+
+        return notify_queued
+
+    def _answer_tier(self) -> str:
+        tier = self._cfg_str("answer_tier", "brief").strip().lower()
+        return tier if tier in ANSWER_TIERS else "brief"
+
+    @staticmethod
+    def _followup_key(event: AstrMessageEvent) -> tuple[str, str]:
+        # Per sender as well, so in a group one user's ``more`` does not
+        # continue someone else's chart.
+        return event.unified_msg_origin, str(event.get_sender_id())
+
+    def _record_history(
+        self, event: AstrMessageEvent, parsed_json: dict[str, Any], text: str
+    ) -> None:
+        if self._store is None or not self._cfg_bool("history_enabled", True):
+            return
+        self._store.add_history(
+            user_id=str(event.get_sender_id()),
+            umo=event.unified_msg_origin,
+            text=text,
+            **history_row(parsed_json),
+        )
+
+    async def _history_text(self, event: AstrMessageEvent, args: str) -> str:
+        if self._store is None or not self._cfg_bool("history_enabled", True):
+            return "历史记录未启用（需开启 store_enabled 与 history_enabled）。"
+        query = parse_history_args(args)
+        if query.unknown:
+            return f"无法识别的卦名或宫位：{query.unknown}（示例：地风升、升、震宫）"
+        user_id = str(event.get_sender_id())
+        if query.entry_id:
+            entry = await asyncio.to_thread(
+                self._store.history_entry, user_id, query.entry_id
+            )
+            if not entry:
+                return f"未找到历史记录 #{query.entry_id}。"
+            return format_history_entry(entry)
+        limit = max(1, self._cfg_int("history_page_size", 10))
+        rows = await asyncio.to_thread(
+            self._store.history_page,
+            user_id,
+            query.hexagram,
+            query.palace,
+            query.before_id,
+            limit,
+        )
+        return format_history_page(rows, query, limit)
+
+    def _finish_trace(self, trace: RequestTrace, outcome: str) -> None:
+        record = trace.finish(outcome)
+        logger.info("liuyao.request " + json.dumps(record, ensure_ascii=False))
+
+    def _count_validation_errors(self, errors: list[dict[str, str]]) -> None:
+        for code in {err.get("code", "") for err in errors}:
+            self._metrics.incr(f"validation.{code or 'unknown'}")
+
+    async def _stats_text(self, event: AstrMessageEvent) -> str:
+        if not event.is_admin():
+            return "仅管理员可查看运行统计。"
+        store = self._store
+        # The store's SQLite queries stay off the event loop, like its reads.
+        store_stats = (
+            await asyncio.to_thread(store.stats) if store else {"enabled": False}
+        )
+        text = format_stats(
+            self._metrics.snapshot(),
+            {
+                "解卦": self._interp_cache.stats(),
+                "知识库": self._kb_cache.stats(),
+                "会话提示词": self._session_prompt_cache.stats(),
+                "人格": self._persona_prompt_cache.stats(),
+                "追问上下文": self._followups.stats(),
+            },
+        )
+        return (
+            text
+            + "\n【并发合并】\n"
+            + json.dumps(self._inflight.stats(), ensure_ascii=False)
+            + "\n【模型调用排队】\n"
+            + json.dumps(self._scheduler.stats(), ensure_ascii=False)
+            + "\n【持久化存储】\n"
+            + json.dumps(store_stats, ensure_ascii=False)
+            + "\n【提示词用量累计（估算）】\n"
+            + json.dumps(self._prompt_usage, ensure_ascii=False)
+        )
+
+    def _record_prompt_usage(
+        self,
+        parsed_json: dict[str, Any],
+        encoding: str,
+        facts: str,
+        user_prompt: str,
+    ) -> None:
+        sizes = {encoding: prompt_size(user_prompt)}
+        # Sizing the unused encodings means building them, so only do it when
+        # the comparison can be seen (debug echo or debug log).
+        if self._cfg_bool("debug", False) or logger.isEnabledFor(logging.DEBUG):
+            for name in PROMPT_ENCODINGS:
+                if name not in sizes:
+                    text = build_user_prompt(parsed_json, name, facts)
+                    sizes[name] = prompt_size(text)
+        for name, size in sizes.items():
+            usage = self._prompt_usage[name]
+            usage["requests"] += 1
+            usage["chars"] += size["chars"]
+            usage["tokens"] += size["tokens"]
+        self._prompt_usage["requests"] += 1
+        if len(sizes) > 1:
+            logger.debug(
+                f"Liuyao prompt size ({encoding} in use): "
+                + json.dumps(sizes, ensure_ascii=False),
+            )
 
     async def _resolve_kb_context(
         self, event: AstrMessageEvent, query: str
     ) -> str | None:
+        if not query:
+            return None
+        # KB selection is per session, so the session is part of the key.
+        cache_key = (event.unified_msg_origin, query)
+        cached = self._kb_cache.get(cache_key)
+        if cached is not None:
+            return cached or None
         try:
-            return await retrieve_knowledge_base(
+            kb_context = await retrieve_knowledge_base(
                 query=query,
                 umo=event.unified_msg_origin,
                 context=self.context,
@@ -126,8 +840,27 @@ class LiuYaoPlugin(Star):
         except Exception as exc:
             logger.error(f"Default KB retrieve failed: {exc!s}")
             return None
+        self._kb_cache.put(cache_key, kb_context or "")
+        return kb_context
 
-    async def _resolve_persona_prompt(self, event: AstrMessageEvent) -> str:
+    async def _resolve_system_prompt(
+        self, event: AstrMessageEvent, cfg: dict[str, Any], encoding: str
+    ) -> tuple[str, str]:
+        umo = event.unified_msg_origin
+        custom_prompt = self._cfg_str("custom_system_prompt", "")
+        cached = self._session_prompt_cache.get(umo)
+        if cached is not None:
+            persona_prompt = cached
+        else:
+            persona_prompt = await self._resolve_persona_prompt(event, cfg)
+            self._session_prompt_cache.put(umo, persona_prompt)
+        # Memoized per (persona, custom prompt, encoding).
+        system_prompt = build_system_prompt(persona_prompt, custom_prompt, encoding)
+        return persona_prompt, system_prompt
+
+    async def _resolve_persona_prompt(
+        self, event: AstrMessageEvent, cfg: dict[str, Any]
+    ) -> str:
         session_cfg = await sp.get_async(
             scope="umo",
             scope_id=event.unified_msg_origin,
@@ -137,7 +870,6 @@ class LiuYaoPlugin(Star):
         persona_id = (session_cfg.get("persona_id") or "").strip()
 
         if not persona_id:
-            cfg = self.context.get_config(umo=event.unified_msg_origin)
             persona_id = (
                 cfg.get("provider_settings", {})
                 .get("default_personality", "default")
@@ -147,12 +879,29 @@ class LiuYaoPlugin(Star):
         if not persona_id or persona_id == "default":
             return ""
 
+        cached = self._persona_prompt_cache.get(persona_id)
+        if cached is not None:
+            return cached
         try:
             persona = await self.context.persona_manager.get_persona(persona_id)
-            return (persona.system_prompt or "").strip()
+            persona_prompt = (persona.system_prompt or "").strip()
         except Exception as exc:
             logger.error(f"Resolve persona failed({persona_id}): {exc!s}")
             return ""
+        self._persona_prompt_cache.put(persona_id, persona_prompt)
+        return persona_prompt
+
+    @staticmethod
+    def _debug_json(
+        parsed: dict[str, Any],
+        errors: list[dict[str, str]] | None = None,
+    ) -> str:
+        if errors is not None:
+            parsed = dict(parsed)
+            parsed[ERRORS_KEY] = errors
+        return "解析 JSON（debug）:\n" + json.dumps(
+            parsed, ensure_ascii=False, indent=2
+        )
 
     @staticmethod
     def _extract_raw_text(message_str: str) -> str:
@@ -160,6 +909,13 @@ class LiuYaoPlugin(Star):
         text = COMMAND_PATTERN.sub("", text, count=1)
         return text.strip()
 
+    @staticmethod
+    def _split_subcommand(text: str) -> tuple[str, str]:
+        m = SUBCOMMAND_PATTERN.match(text)
+        if not m:
+            return "", text
+        return m.group(1).lower(), text[m.end() :].strip()
+
     def _cfg_bool(self, key: str, default: bool) -> bool:
         value = self.config.get(key, default)
         if isinstance(value, bool):
@@ -175,6 +931,15 @@ class LiuYaoPlugin(Star):
             return False
         return default
 
+    def _cfg_int(self, key: str, default: int) -> int:
+        value = self.config.get(key, default)
+        if isinstance(value, bool) or value is None:
+            return default
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return default
+
     def _cfg_str(self, key: str, default: str) -> str:
         value = self.config.get(key, default)
         if value is None:
@@ -182,9 +947,9 @@ class LiuYaoPlugin(Star):
         return str(value)
 
     @staticmethod
-    def _merge_stream_text(current: str, new_chunk: str) -> str:
-        if not current:
-            return new_chunk
-        if new_chunk.startswith(current):
-            return new_chunk
-        return current + new_chunk
+    def _provider_id(provider: Any) -> str:
+        try:
+            meta = provider.meta()
+            return f"{meta.id}:{meta.model}"
+        except Exception:
+            return type(provider).__name__
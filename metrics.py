@@ -0,0 +1,184 @@
+import bisect
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+# Request stages in pipeline order; ``total`` is end-to-end.
+STAGES = (
+    "extract",
+    "parse",
+    "validate",
+    "persona",
+    "kb",
+    "prompt_build",
+    "queue",
+    "ttft",
+    "llm",
+    "total",
+)
+# Upper bucket bounds in milliseconds; the last bucket is open-ended.
+BUCKET_BOUNDS_MS = (
+    0.1,
+    0.5,
+    1,
+    2,
+    5,
+    10,
+    25,
+    50,
+    100,
+    250,
+    500,
+    1000,
+    2500,
+    5000,
+    10000,
+    20000,
+    40000,
+    60000,
+)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (milliseconds)."""
+
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+
+    def observe(self, ms: float) -> None:
+        if self.count == 0 or ms < self.min:
+            self.min = ms
+        if ms > self.max:
+            self.max = ms
+        self.count += 1
+        self.total += ms
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+
+    def percentile(self, pct: float) -> float:
+        """Estimate by linear interpolation inside the bucket holding ``pct``."""
+        if self.count == 0:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            if n and seen + n >= rank:
+                lower = BUCKET_BOUNDS_MS[i - 1] if i else 0.0
+                upper = BUCKET_BOUNDS_MS[i] if i < len(BUCKET_BOUNDS_MS) else self.max
+                lower, upper = max(lower, self.min), min(upper, self.max)
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.max
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 2) if self.count else 0.0,
+            "p50": round(self.percentile(50), 2),
+            "p95": round(self.percentile(95), 2),
+            "p99": round(self.percentile(99), 2),
+            "max": round(self.max, 2),
+        }
+
+
+class Metrics:
+    """In-process stage histograms and counters for the plugin."""
+
+    def __init__(self):
+        self.histograms: dict[str, Histogram] = {}
+        self.counters: Counter[str] = Counter()
+        self.started_at = time.time()
+
+    def observe(self, stage: str, ms: float) -> None:
+        hist = self.histograms.get(stage)
+        if hist is None:
+            hist = self.histograms[stage] = Histogram()
+        hist.observe(ms)
+
+    def incr(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def trace(self) -> "RequestTrace":
+        return RequestTrace(self)
+
+    def snapshot(self) -> dict[str, Any]:
+        order = {stage: i for i, stage in enumerate(STAGES)}
+        return {
+            "uptime_s": round(time.time() - self.started_at),
+            "stages_ms": {
+                stage: self.histograms[stage].snapshot()
+                for stage in sorted(
+                    self.histograms, key=lambda s: (order.get(s, len(order)), s)
+                )
+            },
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+
+class RequestTrace:
+    """Stage timings of one request.
+
+    Every span is observed into the shared histograms when it ends; the
+    per-request totals in ``spans`` feed the structured log line.
+    """
+
+    __slots__ = ("metrics", "spans", "fields", "_start")
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+        self.spans: dict[str, float] = {}
+        self.fields: dict[str, Any] = {}
+        self._start = time.perf_counter()
+
+    def record(self, stage: str, ms: float) -> None:
+        self.spans[stage] = self.spans.get(stage, 0.0) + ms
+        self.metrics.observe(stage, ms)
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        yield
+        # Not reached when the body raises or is cancelled, so abandoned work
+        # (e.g. a KB lookup dropped on a cache hit) is not counted.
+        self.record(stage, (time.perf_counter() - start) * 1000)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def finish(self, outcome: str) -> dict[str, Any]:
+        self.record("total", self.elapsed_ms())
+        self.metrics.incr(f"outcome.{outcome}")
+        return {
+            "outcome": outcome,
+            **self.fields,
+            "spans_ms": {stage: round(ms, 2) for stage, ms in self.spans.items()},
+        }
+
+
+def format_stats(snapshot: dict[str, Any], caches: dict[str, dict[str, Any]]) -> str:
+    lines = [f"六爻插件运行统计（运行 {snapshot['uptime_s']} 秒）", "【阶段耗时 ms】"]
+    stages = snapshot["stages_ms"]
+    if not stages:
+        lines.append("- 暂无请求")
+    for stage, row in stages.items():
+        lines.append(
+            f"- {stage}: n={row['count']} p50={row['p50']} p95={row['p95']} "
+            f"p99={row['p99']} max={row['max']}"
+        )
+    if snapshot["counters"]:
+        lines.append("【计数】")
+        lines.extend(f"- {name}: {n}" for name, n in snapshot["counters"].items())
+    lines.append("【缓存】")
+    for name, stats in caches.items():
+        lines.append(
+            f"- {name}: {stats['entries']} 条, 命中率 {stats['hit_rate']:.0%} "
+            f"({stats['hits']}/{stats['hits'] + stats['misses']})"
+        )
+    return "\n".join(lines)
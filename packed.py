@@ -0,0 +1,211 @@
+import hashlib
+import json
+from typing import Any
+
+from .keys import (
+    BASE_INFO_FIELDS,
+    BASE_INFO_KEY,
+    ERRORS_KEY,
+    FIELD_INDEX,
+    FIELD_RAW,
+    YAO_DATA_KEY,
+)
+from .parser import BRANCH_WUXING, KIN_MAP, YAO_POSITION_MAP
+
+SIX_GODS = ("青龙", "朱雀", "勾陈", "螣蛇", "白虎", "玄武")
+REL_TOKENS = tuple(
+    f"{kin}{branch}{wx}"
+    for kin in KIN_MAP.values()
+    for branch, wx in BRANCH_WUXING.items()
+)
+
+# (dict key, bit width, symbols). Code 0 is None, codes 1.. index into the
+# symbols and the all-ones code means "stored verbatim in extras".
+LINE_FIELDS: tuple[tuple[str, int, tuple[Any, ...]], ...] = (
+    (FIELD_INDEX, 3, (1, 2, 3, 4, 5, 6)),
+    ("六神", 3, SIX_GODS),
+    ("伏神", 7, REL_TOKENS),
+    ("本卦爻", 7, REL_TOKENS),
+    ("本卦爻阴阳", 2, ("阳", "阴")),
+    ("世应", 2, ("世", "应")),
+    ("动爻", 2, (False, True)),
+    ("变卦爻", 7, REL_TOKENS),
+    ("变卦爻阴阳", 2, ("阳", "阴")),
+)
+# Fields derived from the packed ones; only stored in extras when they differ.
+DERIVED_FIELDS = ("pos", "阴阳")
+YIN_YANG_OF_HUA = {"阳": "阳爻", "阴": "阴爻"}
+
+
+def _build_codecs() -> list[tuple[str, int, int, dict, tuple[Any, ...]]]:
+    codecs = []
+    shift = 0
+    for key, width, symbols in LINE_FIELDS:
+        # Keyed by (type, value) so 0/1 never collide with False/True.
+        encode = {(type(v), v): i for i, v in enumerate(symbols, start=1)}
+        codecs.append((key, shift, (1 << width) - 1, encode, (None, *symbols)))
+        shift += width
+    return codecs
+
+
+_CODECS = _build_codecs()
+
+
+class PackedChart:
+    """Slotted, integer-coded form of a parsed chart.
+
+    Each yao line is one int whose bit fields hold the 六神, 六亲/地支 tokens,
+    yin/yang, 世应 and moving codes. Values outside the code tables are kept in
+    ``extras`` so :meth:`to_dict` reproduces the parser output exactly.
+    ``key`` and :meth:`digest` ignore the raw line text.
+    """
+
+    __slots__ = ("base", "lines", "extras", "raw", "errors")
+
+    def __init__(
+        self,
+        base: tuple[Any, ...] | None,
+        lines: tuple[int, ...],
+        extras: tuple[tuple[int, str, Any], ...] = (),
+        raw: tuple[str, ...] = (),
+        errors: tuple[tuple[str, str], ...] = (),
+    ):
+        self.base = base
+        self.lines = lines
+        self.extras = extras
+        self.raw = raw
+        self.errors = errors
+
+    @property
+    def key(self) -> tuple[Any, ...]:
+        return self.base, self.lines, self.extras
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, PackedChart) and self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def digest(self, *context: str) -> str:
+        """Process-independent digest of the chart content plus ``context``.
+
+        Whitespace inside base-info strings is collapsed so a re-pasted chart
+        maps to the same value.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        for value in self.base or ():
+            h.update(_canonical(value).encode("utf-8") + b"\x1f")
+        h.update(b"\x1e")
+        for line in self.lines:
+            h.update(line.to_bytes(8, "little"))
+        h.update(repr(self.extras).encode("utf-8") + b"\x1e")
+        for part in context:
+            h.update(_canonical(part).encode("utf-8") + b"\x1f")
+        return h.hexdigest()
+
+    def to_dict(self) -> dict[str, Any]:
+        extras: dict[int, dict[str, Any]] = {}
+        for line_no, field, value in self.extras:
+            extras.setdefault(line_no, {})[field] = value
+        yao_data = []
+        for line_no, packed in enumerate(self.lines):
+            item = _unpack_line(packed, extras.get(line_no, {}))
+            item[FIELD_RAW] = self.raw[line_no] if line_no < len(self.raw) else ""
+            yao_data.append(item)
+        return {
+            BASE_INFO_KEY: (
+                dict(zip(BASE_INFO_FIELDS, self.base)) if self.base is not None else {}
+            ),
+            YAO_DATA_KEY: yao_data,
+            ERRORS_KEY: [{"code": c, "message": m} for c, m in self.errors],
+        }
+
+    def to_compact(self) -> str:
+        """Small JSON form (no raw text) for persistent storage."""
+        return json.dumps(
+            [self.base, self.lines, self.extras],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_compact(cls, text: str) -> "PackedChart":
+        base, lines, extras = json.loads(text)
+        return cls(
+            base=tuple(base) if base is not None else None,
+            lines=tuple(lines),
+            extras=tuple(tuple(item) for item in extras),
+        )
+
+
+def pack(parsed_json: dict[str, Any]) -> PackedChart:
+    base_info = parsed_json.get(BASE_INFO_KEY) or {}
+    base = (
+        tuple(base_info.get(field) for field in BASE_INFO_FIELDS) if base_info else None
+    )
+    lines = []
+    extras: list[tuple[int, str, Any]] = []
+    raw = []
+    for line_no, item in enumerate(parsed_json.get(YAO_DATA_KEY) or []):
+        if not isinstance(item, dict):
+            continue
+        packed = 0
+        for key, shift, mask, encode, _ in _CODECS:
+            value = item.get(key)
+            try:
+                code = 0 if value is None else encode.get((type(value), value), mask)
+            except TypeError:
+                code = mask
+            if code == mask:
+                extras.append((line_no, key, value))
+            packed |= code << shift
+        for field, expected in zip(DERIVED_FIELDS, _derived(item)):
+            if item.get(field) != expected:
+                extras.append((line_no, field, item.get(field)))
+        lines.append(packed)
+        raw.append(item.get(FIELD_RAW) or "")
+    errors = tuple(
+        (err.get("code", ""), err.get("message", ""))
+        for err in parsed_json.get(ERRORS_KEY) or []
+        if isinstance(err, dict)
+    )
+    return PackedChart(
+        base=base,
+        lines=tuple(lines),
+        extras=tuple(extras),
+        raw=tuple(raw),
+        errors=errors,
+    )
+
+
+def _unpack_line(packed: int, extras: dict[str, Any]) -> dict[str, Any]:
+    values = {}
+    for key, shift, mask, _, symbols in _CODECS:
+        code = (packed >> shift) & mask
+        values[key] = extras[key] if code == mask else symbols[code]
+    pos, yin_yang = _derived(values)
+    return {
+        FIELD_INDEX: values[FIELD_INDEX],
+        "pos": extras.get("pos", pos),
+        "阴阳": extras.get("阴阳", yin_yang),
+        "六神": values["六神"],
+        "伏神": values["伏神"],
+        "本卦爻": values["本卦爻"],
+        "本卦爻阴阳": values["本卦爻阴阳"],
+        "世应": values["世应"],
+        "动爻": values["动爻"],
+        "变卦爻": values["变卦爻"],
+        "变卦爻阴阳": values["变卦爻阴阳"],
+    }
+
+
+def _derived(item: dict[str, Any]) -> tuple[str, str]:
+    index = item.get(FIELD_INDEX)
+    pos = YAO_POSITION_MAP.get(index, str(index))
+    return pos, YIN_YANG_OF_HUA.get(item.get("本卦爻阴阳"), "未知")
+
+
+def _canonical(value: Any) -> str:
+    if value is None:
+        return "\x00"
+    return " ".join(str(value).split())
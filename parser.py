@@ -1,5 +1,6 @@
 import json
 import re
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 from typing import Any
 
@@ -43,8 +44,31 @@ BRANCH_WUXING = {
     "亥": "水",
 }
 
+CHART_HEADER = "灵光象吉·六爻排盘"
 MOVING_MARKERS = {"X", "Χ", "×", "O", "Ｏ","○"}
 DRAW_PATTERN = re.compile(r"(?:-\s*-|—)\s*[XΧ×OＯ○]?")
+HEADER_PATTERN = re.compile(r"(时间|占问|本卦|变卦)[:：]")
+GUA_META_PATTERN = re.compile(r"([^/]+)(?:/([^·]+))?(?:·\d+)?")
+HEADER_FIELDS = {
+    "时间": "起卦时间",
+    "占问": "占问事由",
+    "本卦": "本卦",
+    "变卦": "变卦",
+}
+PILLAR_WORDS = ("年", "月", "日", "时")
+PILLAR_EXCLUDES = ("时间", "本卦", "变卦", "占问")
+BLANK_YAO_TOKENS = {"—", "-", "--"}
+# Runs of text between the line boundaries recognised by ``str.splitlines``.
+LINE_PATTERN = re.compile(r"[^\n\r\v\f\x1c-\x1e\x85\u2028\u2029]+")
+# Input showing no chart header, header field, 四柱 or yao line within this
+# many characters is rejected without reading the rest.
+FAIL_FAST_CHARS = 1500
+# "财戌" -> "妻财戌土"; longer tokens are expanded from their first two chars.
+REL_TOKEN_MAP = {
+    kin + branch: f"{kin_full}{branch}{wx}"
+    for kin, kin_full in KIN_MAP.items()
+    for branch, wx in BRANCH_WUXING.items()
+}
 YAO_POSITION_MAP = {
     6: "上六",
     5: "五爻",
@@ -55,7 +79,7 @@ YAO_POSITION_MAP = {
 }
 
 
-@dataclass
+@dataclass(slots=True)
 class ParsedYaoLine:
     index: int
     pos: str
@@ -87,26 +111,104 @@ class ParsedYaoLine:
         }
 
 
+def iter_lines(text: str) -> Iterator[tuple[int, str]]:
+    """Lazily yield ``(end offset, stripped line)`` for each non-blank line."""
+    for m in LINE_PATTERN.finditer(text):
+        stripped = m.group().strip()
+        if stripped:
+            yield m.end(), stripped
+
+
 class LiuYaoParser:
     @staticmethod
     def parse(raw_text: str) -> dict[str, Any]:
         # Guard against oversized payloads to avoid blocking the event loop too long.
         if len(raw_text or "") > 12000:
-            return {
-                BASE_INFO_KEY: {},
-                YAO_DATA_KEY: [],
-                ERRORS_KEY: [
-                    {
-                        "code": "E001",
-                        "message": "输入文本过长，请控制在 12000 字以内。",
-                    },
-                ],
-            }
-        lines = [
-            line.rstrip() for line in (raw_text or "").splitlines() if line.strip()
-        ]
-        base_info = LiuYaoParser._parse_base_info(lines)
-        yao_lines = LiuYaoParser._parse_yao_lines(lines)
+            return LiuYaoParser._error_result(
+                "E001", "输入文本过长，请控制在 12000 字以内。"
+            )
+
+        headers: dict[str, str | None] = dict.fromkeys(HEADER_FIELDS.values())
+        headers_missing = len(headers)
+        pending: list[str] = []
+        four_pillars: str | None = None
+        kong_wang: str | None = None
+        yao_lines: list[ParsedYaoLine] = []
+        looks_like_chart = False
+
+        # Single lazy pass: every line is normalized once and offered to each
+        # classifier that is still looking for a match. Reading stops once the
+        # six yao lines and every header, 四柱 and 空亡 have been found.
+        for consumed, stripped in iter_lines(raw_text or ""):
+            # A header whose value was empty takes the next non-empty line.
+            for field in pending:
+                headers[field] = stripped
+            headers_missing -= len(pending)
+            pending.clear()
+            if headers_missing and ("：" in stripped or ":" in stripped):
+                for m in HEADER_PATTERN.finditer(stripped):
+                    field = HEADER_FIELDS[m.group(1)]
+                    if headers[field] is not None or field in pending:
+                        continue
+                    value = stripped[m.end() :].strip()
+                    if value:
+                        headers[field] = value
+                        headers_missing -= 1
+                    else:
+                        pending.append(field)
+
+            normalized = " ".join(stripped.split())
+            if four_pillars is None and all(w in normalized for w in PILLAR_WORDS):
+                if not any(prefix in normalized for prefix in PILLAR_EXCLUDES):
+                    four_pillars = normalized
+            if (
+                kong_wang is None
+                and "空" in normalized
+                and "年" not in normalized
+                and "时间" not in normalized
+                and "卦" not in normalized
+            ):
+                kong_wang = normalized
+            if len(yao_lines) < 6 and normalized.split(" ", 1)[0] in SIX_GOD_MAP:
+                yao_lines.append(
+                    LiuYaoParser._parse_single_yao(
+                        6 - len(yao_lines), stripped, normalized
+                    ),
+                )
+            if (
+                len(yao_lines) == 6
+                and not headers_missing
+                and four_pillars is not None
+                and kong_wang is not None
+            ):
+                break
+
+            if not looks_like_chart:
+                looks_like_chart = bool(
+                    yao_lines
+                    or pending
+                    or four_pillars
+                    or CHART_HEADER in stripped
+                    or any(value is not None for value in headers.values())
+                )
+                if not looks_like_chart and consumed > FAIL_FAST_CHARS:
+                    return LiuYaoParser._error_result(
+                        "E002",
+                        f"前 {FAIL_FAST_CHARS} 字内未发现排盘标题、时间/占问/本卦/"
+                        "变卦、四柱或爻象行，请确认粘贴的是六爻排盘。",
+                    )
+
+        ben_name, ben_gong = LiuYaoParser._parse_gua_meta(headers["本卦"])
+        bian_name, bian_gong = LiuYaoParser._parse_gua_meta(headers["变卦"])
+        base_info = {
+            "占问事由": headers["占问事由"],
+            "起卦时间": headers["起卦时间"],
+            "四柱": four_pillars,
+            "空亡_raw": kong_wang,
+            "主卦": ben_name,
+            "变卦": bian_name,
+            "所属宫位": ben_gong or bian_gong,
+        }
 
         return {
             BASE_INFO_KEY: base_info,
@@ -115,58 +217,23 @@ class LiuYaoParser:
         }
 
     @staticmethod
-    def _parse_base_info(lines: list[str]) -> dict[str, Any]:
-        text = "\n".join(lines)
-        time_str = LiuYaoParser._extract_first(text, r"时间[:：]\s*(.+)")
-        question = LiuYaoParser._extract_first(text, r"占问[:：]\s*(.+)")
-        four_pillars = LiuYaoParser._extract_pillars(lines)
-        kong_wang = LiuYaoParser._extract_kong_wang(lines)
-
-        ben_full = LiuYaoParser._extract_first(text, r"本卦[:：]\s*([^\n]+)")
-        bian_full = LiuYaoParser._extract_first(text, r"变卦[:：]\s*([^\n]+)")
-
-        ben_name, ben_gong = LiuYaoParser._parse_gua_meta(ben_full)
-        bian_name, bian_gong = LiuYaoParser._parse_gua_meta(bian_full)
-
+    def _error_result(code: str, message: str) -> dict[str, Any]:
         return {
-            "占问事由": question,
-            "起卦时间": time_str,
-            "四柱": four_pillars,
-            "空亡_raw": kong_wang,
-            "主卦": ben_name,
-            "变卦": bian_name,
-            "所属宫位": ben_gong or bian_gong,
+            BASE_INFO_KEY: {},
+            YAO_DATA_KEY: [],
+            ERRORS_KEY: [{"code": code, "message": message}],
         }
 
     @staticmethod
-    def _parse_yao_lines(lines: list[str]) -> list[ParsedYaoLine]:
-        yao_candidates = []
-        for line in lines:
-            normalized = LiuYaoParser._normalize_space(line)
-            if not normalized:
-                continue
-            first = normalized.split(" ", 1)[0]
-            if first in SIX_GOD_MAP:
-                yao_candidates.append(line)
-
-        parsed: list[ParsedYaoLine] = []
-        index = 6
-        for line in yao_candidates[:6]:
-            parsed.append(LiuYaoParser._parse_single_yao(index, line))
-            index -= 1
-        return parsed
-
-    @staticmethod
-    def _parse_single_yao(index: int, line: str) -> ParsedYaoLine:
-        raw = line.strip()
-        normalized = LiuYaoParser._normalize_space(raw)
+    def _parse_single_yao(index: int, raw: str, normalized: str) -> ParsedYaoLine:
         moving = any(marker in raw for marker in MOVING_MARKERS)
+        pos = LiuYaoParser._pos_of(index)
 
-        parts = normalized.split(" ")
+        parts = normalized.split(" ", 3)
         if len(parts) < 4:
             return ParsedYaoLine(
                 index=index,
-                pos=LiuYaoParser._pos_of(index),
+                pos=pos,
                 yin_yang="未知",
                 six_god=None,
                 fu_shen=None,
@@ -179,15 +246,15 @@ class LiuYaoParser:
                 raw=raw,
             )
 
-        god_raw, left_token, ben_token = parts[0], parts[1], parts[2]
-        tail = " ".join(parts[3:])
+        god_raw, left_token, ben_token, tail = parts
+        six_god = SIX_GOD_MAP.get(god_raw, god_raw)
         first_draw = DRAW_PATTERN.search(tail)
         if not first_draw:
             return ParsedYaoLine(
                 index=index,
-                pos=LiuYaoParser._pos_of(index),
+                pos=pos,
                 yin_yang="未知",
-                six_god=SIX_GOD_MAP.get(god_raw, god_raw),
+                six_god=six_god,
                 fu_shen=LiuYaoParser._expand_rel_token(left_token),
                 ben_yao=LiuYaoParser._expand_rel_token(ben_token),
                 ben_hua=None,
@@ -215,9 +282,9 @@ class LiuYaoParser:
         yin_yang = "阳爻" if ben_hua == "阳" else "阴爻" if ben_hua == "阴" else "未知"
         return ParsedYaoLine(
             index=index,
-            pos=LiuYaoParser._pos_of(index),
+            pos=pos,
             yin_yang=yin_yang,
-            six_god=SIX_GOD_MAP.get(god_raw, god_raw),
+            six_god=six_god,
             fu_shen=LiuYaoParser._expand_rel_token(left_token),
             ben_yao=LiuYaoParser._expand_rel_token(ben_token),
             ben_hua=ben_hua,
@@ -230,99 +297,41 @@ class LiuYaoParser:
 
     @staticmethod
     def _normalize_space(text: str) -> str:
-        text = text.replace("\u3000", " ")
-        text = text.replace("\t", " ")
-        text = re.sub(r"\s+", " ", text)
-        return text.strip()
+        return " ".join(text.split())
 
     @staticmethod
-    def _detect_draw(text: str) -> str | None:
-        t = LiuYaoParser._normalize_space(text)
-        if "—" in t:
-            return "阳"
-        if re.search(r"-\s*-|--", t):
-            return "阴"
-        return None
+    def _detect_draw(draw: str) -> str:
+        # DRAW_PATTERN only matches "—" (yang) or a dashed pair (yin).
+        return "阳" if draw.startswith("—") else "阴"
 
     @staticmethod
     def _extract_shi_ying(text: str) -> tuple[str, str | None]:
-        t = LiuYaoParser._normalize_space(text)
-        shi_ying: str | None = None
-        if t.startswith("世 "):
-            shi_ying = "世"
-            t = t[2:]
-        elif t == "世":
-            shi_ying = "世"
-            t = ""
-        elif t.startswith("应 "):
-            shi_ying = "应"
-            t = t[2:]
-        elif t == "应":
-            shi_ying = "应"
-            t = ""
-        return LiuYaoParser._normalize_space(t), shi_ying
+        # ``text`` is already whitespace-normalized by the caller.
+        if text[:1] in ("世", "应") and (len(text) == 1 or text[1] == " "):
+            return text[2:], text[0]
+        return text, None
 
     @staticmethod
     def _extract_yao_token(text: str) -> str | None:
-        t = LiuYaoParser._normalize_space(text)
-        if not t:
+        if not text:
             return None
-        first = t.split(" ", 1)[0]
-        if first in {"—", "-", "--"}:
+        first = text.split(" ", 1)[0]
+        if first in BLANK_YAO_TOKENS:
             return None
         return first
 
     @staticmethod
     def _expand_rel_token(token: str | None) -> str | None:
-        if not token:
-            return None
-        token = token.strip()
-        if len(token) < 2:
-            return token
-
-        kin = token[0]
-        branch = token[1]
-        kin_full = KIN_MAP.get(kin)
-        wx = BRANCH_WUXING.get(branch)
-        if kin_full and wx:
-            return f"{kin_full}{branch}{wx}"
-        return token
-
-    @staticmethod
-    def _extract_first(text: str, pattern: str) -> str | None:
-        m = re.search(pattern, text)
-        return m.group(1).strip() if m else None
-
-    @staticmethod
-    def _extract_pillars(lines: list[str]) -> str | None:
-        for line in lines:
-            normalized = LiuYaoParser._normalize_space(line)
-            if all(word in normalized for word in ("年", "月", "日", "时")):
-                if not any(
-                    prefix in normalized for prefix in ("时间", "本卦", "变卦", "占问")
-                ):
-                    return normalized
-        return None
-
-    @staticmethod
-    def _extract_kong_wang(lines: list[str]) -> str | None:
-        for line in lines:
-            normalized = LiuYaoParser._normalize_space(line)
-            if (
-                "空" in normalized
-                and "年" not in normalized
-                and "时间" not in normalized
-            ):
-                if normalized.count("空") >= 1 and "卦" not in normalized:
-                    return normalized
-        return None
+        if not token or len(token) < 2:
+            return token or None
+        return REL_TOKEN_MAP.get(token[:2], token)
 
     @staticmethod
     def _parse_gua_meta(text: str | None) -> tuple[str | None, str | None]:
         if not text:
             return None, None
         t = LiuYaoParser._normalize_space(text)
-        m = re.match(r"([^/]+)(?:/([^·]+))?(?:·\d+)?", t)
+        m = GUA_META_PATTERN.match(t)
         if not m:
             return t, None
         gua_name = (m.group(1) or "").strip() or None
@@ -334,6 +343,43 @@ class LiuYaoParser:
         return YAO_POSITION_MAP.get(index, str(index))
 
 
+def iter_charts(lines: Iterable[str]) -> Iterator[str]:
+    """Lazily split text, given line by line, before each ``CHART_HEADER``.
+
+    The header may appear anywhere in a line. Text before the first header
+    stays with the first chart; charts are stripped and empty text yields
+    nothing.
+    """
+    buf: list[str] = []
+    seen_header = False
+    for line in lines:
+        pos = line.find(CHART_HEADER)
+        while pos != -1:
+            if seen_header:
+                buf.append(line[:pos])
+                yield "".join(buf).strip()
+                buf = []
+                line = line[pos:]
+                pos = 0
+            seen_header = True
+            pos = line.find(CHART_HEADER, pos + len(CHART_HEADER))
+        buf.append(line)
+    text = "".join(buf).strip()
+    if text:
+        yield text
+
+
+def split_charts(raw_text: str) -> list[str]:
+    """Split a message holding several charts on the ``CHART_HEADER`` line.
+
+    Text before the first header stays with the first chart, so a single chart
+    (with or without header) always comes back as one element.
+    """
+    text = raw_text or ""
+    charts = list(iter_charts(text.splitlines(keepends=True)))
+    return charts if len(charts) > 1 else [text]
+
+
 if __name__ == "__main__":
     SAMPLE = """灵光象吉·六爻排盘
 时间：2026年02月17日 18:11:37
@@ -1,7 +1,14 @@
 import json
+from functools import lru_cache
 from typing import Any
 
-from .keys import BASE_INFO_KEY, YAO_DATA_KEY
+from .keys import (
+    BASE_INFO_FIELDS,
+    BASE_INFO_KEY,
+    FIELD_INDEX,
+    FIELD_MOVING,
+    YAO_DATA_KEY,
+)
 
 DEFAULT_SYSTEM_PROMPT = """你是一名严谨的六爻解析助手。
 你的任务是基于用户给出的结构化排盘 JSON 进行解读，不要编造不存在的数据字段。
@@ -12,35 +19,198 @@ DEFAULT_SYSTEM_PROMPT = """你是一名严谨的六爻解析助手。
 """
 
 
+PROMPT_ENCODINGS = ("json", "compact")
+# ``brief`` answers (1) and (3) only; the rest follows on ``/liuyao more``.
+ANSWER_TIERS = ("brief", "full")
+
+# (column header, parsed field) in table order; 动爻 is rendered as 动/-.
+YAO_TABLE_COLUMNS = (
+    ("爻位", "pos"),
+    ("六神", "六神"),
+    ("伏神", "伏神"),
+    ("本卦爻", "本卦爻"),
+    ("阴阳", "本卦爻阴阳"),
+    ("世应", "世应"),
+    ("动", FIELD_MOVING),
+    ("变卦爻", "变卦爻"),
+    ("变阴阳", "变卦爻阴阳"),
+)
+
+OUTPUT_SCHEMA = (
+    "请按以下结构输出：\n"
+    "(1) 卦象概览（主卦/变卦/世应/动爻）\n"
+    "(2) 严密的卦理推演过程\n"
+    "(3) 问题解答以及吉凶判断 (不要使用模糊的词汇，比如：吉凶参半、中平、吉凶未定等，要给出具体的吉凶判断)\n"
+    "(4) 趋吉避凶方式（包括但不限于：根据卦象、五行关系、用神状态，提出具体化解方式或行动方向等）\n"
+    "(5) 更多细节分析（比如：过去、现在、未来的发展趋势，以及可能的风险等）\n"
+    "(6) 知识库引用依据（卦辞、爻辞、象辞等）"
+)
+
+# How the chart in the user message is laid out, per encoding.
+CHART_GUIDES = {
+    "json": (
+        "排盘以 JSON 给出。"
+        f"字段说明：{BASE_INFO_KEY} 为基础信息"
+        f"（{'、'.join(BASE_INFO_FIELDS)}）；"
+        f"{YAO_DATA_KEY} 中的关键字段包含 伏神、本卦爻、本卦爻阴阳、"
+        "变卦爻、变卦爻阴阳、世应、动爻。"
+    ),
+    "compact": (
+        "排盘以精简文本给出：先是基础信息，再是爻象表（自上爻至初爻，"
+        "列以 | 分隔，- 表示无）。"
+    ),
+}
+DATA_RULES = (
+    "请严格以排盘数据为准，不要自行臆造额外字段。"
+    "用户消息中的“本地规则推算事实”由查表得出，可直接引用，无需重新推导；"
+    "“知识库检索结果”仅作参考依据。"
+)
+BRIEF_INSTRUCTION = (
+    "本次只输出 (1) 卦象概览 与 (3) 问题解答以及吉凶判断，其余小节暂不展开；"
+    "全文不超过 {max_chars} 字，直接给出明确结论。"
+)
+MORE_INSTRUCTION = (
+    "请接着上一轮的回答，按输出结构补充其余小节 (2)(4)(5)(6)，"
+    "不要重复已给出的概览与结论。"
+)
+KB_CONTEXT_HEADER = "知识库检索结果（参考）："
+FACTS_HEADER = "本地规则推算事实（查表得出，可直接引用，无需重新推导）："
+
+
+@lru_cache(maxsize=128)
 def build_system_prompt(
     persona_prompt: str = "",
     custom_system_prompt: str = "",
+    encoding: str = "json",
 ) -> str:
-    base = (custom_system_prompt or "").strip() or DEFAULT_SYSTEM_PROMPT
+    """Static instructions first, persona last.
+
+    Everything up to the persona is byte-identical for every request with the
+    same custom prompt and encoding, so providers with prefix/KV caching can
+    reuse it; the chart itself only appears in the user message.
+    """
+    base = (custom_system_prompt or "").strip() or DEFAULT_SYSTEM_PROMPT.strip()
+    guide = CHART_GUIDES.get(encoding, CHART_GUIDES["json"])
+    prompt = f"{base}\n\n{guide}\n{DATA_RULES}\n\n{OUTPUT_SCHEMA}"
     if persona_prompt:
-        return f"{persona_prompt.strip()}\n\n{base}"
-    return base
+        prompt += (
+            "\n\n人设（仅影响语气与称呼，不改变以上规则）：\n"
+            f"{persona_prompt.strip()}"
+        )
+    return prompt
 
 
-def build_user_prompt(parsed_json: dict[str, Any]) -> str:
-    safe_json = _sanitize_prompt_payload(parsed_json)
-    field_desc = (
-        f"{YAO_DATA_KEY} 中的关键字段包含 伏神、本卦爻、本卦爻阴阳、"
-        "变卦爻、变卦爻阴阳、世应、动爻。"
-    )
-    return (
-        "以下是六爻排盘解析后的 JSON，请给出解卦结果：\n\n"
-        f"{json.dumps(safe_json, ensure_ascii=False, indent=2)}\n\n"
-        f"字段说明：{BASE_INFO_KEY} 与 {field_desc}\n"
-        "请严格以这些字段为准，不要自行臆造额外字段。\n\n"
-        "请按以下结构输出：\n"
-        "(1) 卦象概览（主卦/变卦/世应/动爻）\n"
-        "(2) 严密的卦理推演过程\n"
-        "(3) 问题解答以及吉凶判断 (不要使用模糊的词汇，比如：吉凶参半、中平、吉凶未定等，要给出具体的吉凶判断)\n"
-        "(4) 趋吉避凶方式（包括但不限于：根据卦象、五行关系、用神状态，提出具体化解方式或行动方向等）\n"
-        "(5) 更多细节分析（比如：过去、现在、未来的发展趋势，以及可能的风险等）\n"
-        "(6) 知识库引用依据（卦辞、爻辞、象辞等）"
-    )
+def build_user_prompt(
+    parsed_json: dict[str, Any],
+    encoding: str = "json",
+    facts: str = "",
+) -> str:
+    """Per-chart part of the prompt; instructions live in the system prompt."""
+    facts_block = f"{FACTS_HEADER}\n{facts}\n\n" if facts else ""
+    if encoding == "compact":
+        chart = encode_chart_compact(parsed_json)
+    else:
+        chart = json.dumps(
+            _sanitize_prompt_payload(parsed_json), ensure_ascii=False, indent=2
+        )
+    return f"{facts_block}六爻排盘（请据此给出解卦结果）：\n{chart}"
+
+
+def with_answer_tier(user_prompt: str, tier: str, max_chars: int = 300) -> str:
+    """Tier instruction goes last, after the chart, so everything before it
+    (system prompt included) is shared by both tiers."""
+    if tier != "brief":
+        return user_prompt
+    return f"{user_prompt}\n\n{BRIEF_INSTRUCTION.format(max_chars=max_chars)}"
+
+
+def with_kb_context(user_prompt: str, kb_context: str | None) -> str:
+    """Put KB text ahead of the chart (it depends only on the hexagram)."""
+    if not kb_context:
+        return user_prompt
+    return f"{KB_CONTEXT_HEADER}\n{kb_context}\n\n{user_prompt}"
+
+
+def encode_chart_compact(parsed_json: dict[str, Any], max_str_len: int = 300) -> str:
+    """Terse base info plus a fixed-column yao table, built in one pass.
+
+    The ``raw`` line text is dropped because every field in it is already
+    present as a column; string values get the same whitespace collapsing and
+    truncation as ``_sanitize_prompt_payload``.
+    """
+    base = parsed_json.get(BASE_INFO_KEY) or {}
+    lines = [
+        f"{key}：{_compact_cell(base.get(key), max_str_len)}"
+        for key in BASE_INFO_FIELDS
+        if base.get(key)
+    ]
+    lines.append("|".join(header for header, _ in YAO_TABLE_COLUMNS))
+    for item in parsed_json.get(YAO_DATA_KEY) or []:
+        if not isinstance(item, dict):
+            continue
+        cells = []
+        for _, field in YAO_TABLE_COLUMNS:
+            value = item.get(field)
+            if field == FIELD_MOVING:
+                cells.append("动" if value else "-")
+            else:
+                cells.append(_compact_cell(value, max_str_len))
+        lines.append("|".join(cells))
+    return "\n".join(lines)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate: one per CJK/non-ASCII char, one per 4 ASCII chars."""
+    ascii_len = len(text.encode("ascii", "ignore"))
+    return (len(text) - ascii_len) + (ascii_len + 3) // 4
+
+
+def prompt_size(text: str) -> dict[str, int]:
+    return {
+        "chars": len(text),
+        "bytes": len(text.encode("utf-8")),
+        "tokens": estimate_tokens(text),
+    }
+
+
+def build_kb_query(parsed_json: dict[str, Any]) -> str:
+    """Short retrieval query: hexagram names, palace, moving lines and 世/应.
+
+    The question text is left out on purpose so the same hexagram hits the
+    same knowledge-base entries (and the same cache key) across askers.
+    """
+    base = parsed_json.get(BASE_INFO_KEY) or {}
+    parts = []
+    ben_name = base.get("主卦")
+    bian_name = base.get("变卦")
+    if ben_name:
+        parts.append(f"主卦 {ben_name}")
+    if bian_name and bian_name != ben_name:
+        parts.append(f"变卦 {bian_name}")
+    if base.get("所属宫位"):
+        parts.append(str(base["所属宫位"]))
+
+    yao_list = [
+        item for item in parsed_json.get(YAO_DATA_KEY) or [] if isinstance(item, dict)
+    ]
+    for item in sorted(yao_list, key=lambda x: x.get(FIELD_INDEX) or 0):
+        shi_ying = item.get("世应") or ""
+        ben_yao = item.get("本卦爻") or ""
+        if item.get(FIELD_MOVING):
+            change = f"化{item['变卦爻']}" if item.get("变卦爻") else ""
+            parts.append(f"{item.get('pos')}{shi_ying}动 {ben_yao}{change}")
+        elif shi_ying:
+            parts.append(f"{shi_ying}爻 {ben_yao}")
+    return " ".join(parts)
+
+
+def _compact_cell(value: Any, max_str_len: int) -> str:
+    if value is None or value == "":
+        return "-"
+    text = " ".join(str(value).split()).replace("|", "/")
+    if len(text) > max_str_len:
+        return text[:max_str_len] + "...(truncated)"
+    return text
 
 
 def _sanitize_prompt_payload(payload: Any, max_str_len: int = 300) -> Any:
@@ -0,0 +1,160 @@
+import asyncio
+import time
+from collections import Counter, OrderedDict, deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+
+
+class SchedulerBusy(Exception):
+    """The wait queue is full; the request is rejected without queueing."""
+
+
+class FairScheduler:
+    """Admission control for provider calls.
+
+    At most ``max_concurrent`` calls run at once (0 = unlimited) and each
+    session runs at most ``per_session`` of them. Waiting requests are kept in
+    one FIFO per session and the sessions are served round-robin, so a single
+    busy group cannot starve the others. When ``max_queue`` requests are
+    already waiting, new ones are rejected with :class:`SchedulerBusy`.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        per_session: int = 2,
+        max_queue: int = 64,
+    ):
+        self.max_concurrent = max(0, int(max_concurrent))
+        self.per_session = max(1, int(per_session))
+        self.max_queue = max(0, int(max_queue))
+        self.admitted = 0
+        self.queued_total = 0
+        self.rejected = 0
+        self.max_depth = 0
+        self._active = 0
+        self._running: Counter[str] = Counter()
+        self._waiting: OrderedDict[str, deque[asyncio.Future]] = OrderedDict()
+        self._depth = 0
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        session: str,
+        on_queued: Callable[[int], Awaitable[None]] | None = None,
+    ) -> AsyncIterator[float]:
+        """Hold one call slot for ``session``; yields the queue wait in ms."""
+        start = time.perf_counter()
+        await self._acquire(session, on_queued)
+        try:
+            yield (time.perf_counter() - start) * 1000
+        finally:
+            self._release(session)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "active": self._active,
+            "queued": self._depth,
+            "queued_sessions": len(self._waiting),
+            "max_depth": self.max_depth,
+            "admitted": self.admitted,
+            "queued_total": self.queued_total,
+            "rejected": self.rejected,
+        }
+
+    def _can_run(self, session: str) -> bool:
+        return (
+            not self.max_concurrent or self._active < self.max_concurrent
+        ) and self._running[session] < self.per_session
+
+    async def _acquire(
+        self,
+        session: str,
+        on_queued: Callable[[int], Awaitable[None]] | None,
+    ) -> None:
+        if session not in self._waiting and self._can_run(session):
+            self._start(session)
+            return
+        if self._depth >= self.max_queue:
+            self.rejected += 1
+            raise SchedulerBusy(self._depth)
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue = self._waiting.setdefault(session, deque())
+        queue.append(waiter)
+        self._depth += 1
+        self.queued_total += 1
+        self.max_depth = max(self.max_depth, self._depth)
+        position = self._position(session, len(queue) - 1)
+        try:
+            if on_queued is not None:
+                await on_queued(position)
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just before the cancellation landed: give it back.
+                self._release(session)
+            else:
+                waiter.cancel()
+                self._discard(session, waiter)
+            raise
+
+    def _start(self, session: str) -> None:
+        self._active += 1
+        self._running[session] += 1
+        self.admitted += 1
+
+    def _release(self, session: str) -> None:
+        self._active -= 1
+        self._running[session] -= 1
+        if self._running[session] <= 0:
+            del self._running[session]
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        progressed = True
+        while self._waiting and progressed:
+            progressed = False
+            for session in list(self._waiting):
+                if self.max_concurrent and self._active >= self.max_concurrent:
+                    return
+                if not self._can_run(session):
+                    continue
+                queue = self._waiting.pop(session)
+                waiter = queue.popleft()
+                self._depth -= 1
+                if queue:
+                    self._waiting[session] = queue  # back of the rotation
+                progressed = True
+                if waiter.done():
+                    continue
+                self._start(session)
+                waiter.set_result(None)
+
+    def _discard(self, session: str, waiter: asyncio.Future) -> None:
+        queue = self._waiting.get(session)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        self._depth -= 1
+        if not queue:
+            del self._waiting[session]
+        # The slot this waiter was blocking on may now suit someone else.
+        self._dispatch()
+
+    def _position(self, session: str, index: int) -> int:
+        """Estimated 1-based position of the ``index``-th waiter of ``session``.
+
+        Round-robin serves at most one request per session per round, so every
+        other session contributes up to ``index + 1`` requests ahead of it.
+        """
+        ahead = index
+        for other, queue in self._waiting.items():
+            if other != session:
+                ahead += min(len(queue), index + 1)
+        return ahead + 1
@@ -0,0 +1,51 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one task.
+
+    The first caller starts the task; later callers with the same key await
+    the same task until it finishes. Every caller waits through
+    ``asyncio.shield`` so cancelling one waiter never cancels the shared call.
+    """
+
+    def __init__(self):
+        self.started = 0
+        self.shared = 0
+        self._calls: dict[Any, asyncio.Task] = {}
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._calls
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Any, factory: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.started += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "in_flight": len(self._calls),
+            "started": self.started,
+            "shared": self.shared,
+        }
+
+    def _forget(self, key: Any, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieve the outcome so a call whose waiters all left does not log
+        # "exception was never retrieved".
+        if not task.cancelled():
+            task.exception()
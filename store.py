@@ -0,0 +1,311 @@
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from astrbot.api import logger
+
+from .ganzhi import CAST_TIME_PATTERN
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interpretations (
+    key TEXT PRIMARY KEY,
+    chart TEXT NOT NULL,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_interpretations_accessed
+    ON interpretations (accessed_at);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    umo TEXT NOT NULL,
+    chart_key TEXT NOT NULL,
+    hexagram TEXT NOT NULL,
+    bian_hexagram TEXT NOT NULL,
+    palace TEXT NOT NULL,
+    cast_at TEXT NOT NULL,
+    question TEXT NOT NULL,
+    chart TEXT NOT NULL,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (user_id, chart_key)
+);
+CREATE INDEX IF NOT EXISTS idx_history_user ON history (user_id, id);
+CREATE INDEX IF NOT EXISTS idx_history_hexagram ON history (user_id, hexagram, id);
+CREATE INDEX IF NOT EXISTS idx_history_palace ON history (user_id, palace, id);
+CREATE INDEX IF NOT EXISTS idx_history_cast_at ON history (user_id, cast_at);
+"""
+EVICT_INTERVAL_SECONDS = 300.0
+HISTORY_COLUMNS = (
+    "user_id",
+    "umo",
+    "chart_key",
+    "hexagram",
+    "bian_hexagram",
+    "palace",
+    "cast_at",
+    "question",
+    "chart",
+    "text",
+)
+HISTORY_LIST_COLUMNS = (
+    "id",
+    "hexagram",
+    "bian_hexagram",
+    "palace",
+    "cast_at",
+    "question",
+)
+
+
+def normalize_cast_time(text: str | None) -> str:
+    """'2026年02月17日 18:11:37' -> '2026-02-17 18:11:37' (sortable)."""
+    m = CAST_TIME_PATTERN.search((text or "").strip())
+    if not m:
+        return (text or "").strip()
+    year, month, day, hour, minute, second = m.groups()
+    date = f"{year}-{int(month):02d}-{int(day):02d}"
+    if hour is None:
+        return date
+    return f"{date} {int(hour):02d}:{minute}:{second or '00'}"
+
+
+class InterpretationStore:
+    """SQLite (WAL) store of interpretations keyed by chart fingerprint.
+
+    Writes are queued and committed in batches by a background thread, so the
+    event loop never waits on disk. Reads use their own connection; call them
+    through ``asyncio.to_thread``. Rows older than ``max_age_days`` or beyond
+    ``max_entries`` (least recently read first) are evicted periodically.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = 5000,
+        max_age_days: float = 30.0,
+        history_per_user: int = 2000,
+        batch_size: int = 64,
+        flush_interval: float = 1.0,
+    ):
+        self.path = Path(path)
+        self.max_entries = max(0, int(max_entries))
+        self.history_per_user = max(0, int(history_per_user))
+        self.max_age_seconds = max(0.0, float(max_age_days)) * 86400
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.written = 0
+        self.evicted = 0
+        self._queue: queue.Queue[tuple | None] = queue.Queue()
+        self._reader: sqlite3.Connection | None = None
+        self._read_lock = threading.Lock()
+        self._writer: threading.Thread | None = None
+
+    def open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        with conn:
+            conn.executescript(SCHEMA)
+        self._reader = conn
+        self._writer = threading.Thread(
+            target=self._write_loop, name="liuyao-store", daemon=True
+        )
+        self._writer.start()
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join(timeout=10)
+            self._writer = None
+        if self._reader is not None:
+            with self._read_lock:
+                self._reader.close()
+            self._reader = None
+
+    def put(self, key: str, chart: str, text: str) -> None:
+        """Queue a write; returns immediately."""
+        if self._writer is not None:
+            self._queue.put(("put", key, chart, text, time.time()))
+
+    def add_history(self, **row: str) -> None:
+        """Queue a history row (see ``HISTORY_COLUMNS``); returns immediately.
+
+        A user re-sending the same chart replaces the old row, so it moves to
+        the top of their history instead of being listed twice.
+        """
+        if self._writer is not None:
+            values = tuple(row.get(column, "") or "" for column in HISTORY_COLUMNS)
+            self._queue.put(("history", values, time.time()))
+
+    def history_page(
+        self,
+        user_id: str,
+        hexagram: str = "",
+        palace: str = "",
+        before_id: int = 0,
+        limit: int = 10,
+    ) -> list[dict[str, Any]]:
+        """Newest first; pass the last ``id`` of a page as ``before_id``."""
+        if self._reader is None:
+            return []
+        sql = f"SELECT {', '.join(HISTORY_LIST_COLUMNS)} FROM history WHERE user_id = ?"
+        params: list[Any] = [user_id]
+        if hexagram:
+            sql += " AND hexagram = ?"
+            params.append(hexagram)
+        if palace:
+            sql += " AND palace = ?"
+            params.append(palace)
+        if before_id:
+            sql += " AND id < ?"
+            params.append(before_id)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._read_lock:
+            rows = self._reader.execute(sql, params).fetchall()
+        return [dict(zip(HISTORY_LIST_COLUMNS, row)) for row in rows]
+
+    def history_entry(self, user_id: str, entry_id: int) -> dict[str, Any] | None:
+        if self._reader is None:
+            return None
+        columns = ("id", *HISTORY_COLUMNS, "created_at")
+        with self._read_lock:
+            row = self._reader.execute(
+                f"SELECT {', '.join(columns)} FROM history "
+                "WHERE id = ? AND user_id = ?",
+                (entry_id, user_id),
+            ).fetchone()
+        return dict(zip(columns, row)) if row else None
+
+    def get(self, key: str) -> str | None:
+        if self._reader is None:
+            return None
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT text FROM interpretations WHERE key = ? AND created_at >= ?",
+                (key, self._min_created_at()),
+            ).fetchone()
+        if row is None:
+            return None
+        self._queue.put(("touch", key, time.time()))
+        return row[0]
+
+    def load_recent(self, limit: int) -> list[tuple[str, str]]:
+        """Most recently read entries first, for warming the in-memory cache."""
+        if self._reader is None or limit <= 0:
+            return []
+        with self._read_lock:
+            return self._reader.execute(
+                "SELECT key, text FROM interpretations WHERE created_at >= ? "
+                "ORDER BY accessed_at DESC LIMIT ?",
+                (self._min_created_at(), limit),
+            ).fetchall()
+
+    def stats(self) -> dict[str, Any]:
+        entries = history = 0
+        if self._reader is not None:
+            with self._read_lock:
+                entries, history = self._reader.execute(
+                    "SELECT (SELECT COUNT(*) FROM interpretations), "
+                    "(SELECT COUNT(*) FROM history)"
+                ).fetchone()
+        return {
+            "entries": entries,
+            "history": history,
+            "pending_writes": self._queue.qsize(),
+            "written": self.written,
+            "evicted": self.evicted,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _min_created_at(self) -> float:
+        return time.time() - self.max_age_seconds if self.max_age_seconds else 0.0
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        next_evict = 0.0
+        running = True
+        while running:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                while item is not None:
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    item = self._queue.get_nowait()
+                running = item is not None
+            except queue.Empty:
+                pass
+            try:
+                if batch:
+                    self._apply(conn, batch)
+                if time.monotonic() >= next_evict or not running:
+                    self._evict(conn)
+                    next_evict = time.monotonic() + EVICT_INTERVAL_SECONDS
+            except sqlite3.Error as exc:
+                logger.error(f"Liuyao store write failed: {exc!s}")
+        conn.close()
+
+    def _apply(self, conn: sqlite3.Connection, batch: list[tuple]) -> None:
+        puts = [(i[1], i[2], i[3], i[4], i[4]) for i in batch if i[0] == "put"]
+        touches = [(i[2], i[1]) for i in batch if i[0] == "touch"]
+        history = [(*i[1], i[2]) for i in batch if i[0] == "history"]
+        with conn:
+            if puts:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO interpretations "
+                    "(key, chart, text, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    puts,
+                )
+            if touches:
+                conn.executemany(
+                    "UPDATE interpretations SET accessed_at = ? WHERE key = ?",
+                    touches,
+                )
+            if history:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO history "
+                    f"({', '.join(HISTORY_COLUMNS)}, created_at) "
+                    f"VALUES ({', '.join('?' * (len(HISTORY_COLUMNS) + 1))})",
+                    history,
+                )
+                if self.history_per_user:
+                    self._trim_history(conn, {row[0] for row in history})
+        self.written += len(puts) + len(history)
+
+    def _trim_history(self, conn: sqlite3.Connection, users: set[str]) -> None:
+        for user_id in users:
+            self.evicted += conn.execute(
+                "DELETE FROM history WHERE user_id = ? AND id <= ("
+                "SELECT id FROM history WHERE user_id = ? "
+                "ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (user_id, user_id, self.history_per_user),
+            ).rowcount
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        with conn:
+            removed = 0
+            if self.max_age_seconds:
+                removed += conn.execute(
+                    "DELETE FROM interpretations WHERE created_at < ?",
+                    (self._min_created_at(),),
+                ).rowcount
+            if self.max_entries:
+                removed += conn.execute(
+                    "DELETE FROM interpretations WHERE key IN ("
+                    "SELECT key FROM interpretations "
+                    "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                ).rowcount
+        self.evicted += removed
@@ -0,0 +1,106 @@
+import re
+
+DELIVERY_MODES = ("off", "section", "paragraph")
+SECTION_HEADING_PATTERN = re.compile(r"(?:^|\n)[ \t]*[(（][1-6][)）]")
+PARAGRAPH_BREAK = "\n\n"
+PARAGRAPH_MIN_CHARS = 200
+# Sections longer than this are also cut at paragraph breaks, so a model that
+# ignores the headings still gets delivered progressively.
+SECTION_MAX_CHARS = 1500
+# Characters of earlier text re-checked with each delta, so a heading or
+# paragraph break split across chunks is still noticed.
+BOUNDARY_OVERLAP = 8
+
+
+class StreamAssembler:
+    """Accumulates provider stream deltas in linear time and cuts sections.
+
+    ``feed`` takes the text of chunk responses, which are deltas. ``finish``
+    takes the final full response, which becomes the answer text without
+    being delivered again. Completed sections are returned as soon as the
+    next heading (``(1)``–``(6)`` from ``build_user_prompt``) or paragraph
+    break arrives; the pending section is only joined when a delta may have
+    completed it.
+    """
+
+    def __init__(self, mode: str = "section"):
+        self.mode = mode if mode in DELIVERY_MODES else "section"
+        self._parts: list[str] = []
+        self._final: str | None = None
+        self._pending: list[str] = []
+        self._pending_len = 0
+        self._recent = ""
+
+    def feed(self, delta: str) -> list[str]:
+        if not delta:
+            return []
+        self._parts.append(delta)
+        if self.mode == "off":
+            return []
+        window = self._recent + delta
+        self._recent = window[-BOUNDARY_OVERLAP:]
+        self._pending.append(delta)
+        self._pending_len += len(delta)
+        if not self._may_cut(window, len(delta)):
+            return []
+        return self._cut_sections()
+
+    def finish(self, text: str) -> list[str]:
+        """Take the provider's final full response as the answer text.
+
+        Its sections are only delivered when no chunks came before it.
+        """
+        if not self._parts:
+            return self.feed(text)
+        self._final = text
+        return []
+
+    def flush(self) -> str | None:
+        if self.mode == "off":
+            return None
+        rest = "".join(self._pending).strip()
+        self._pending = []
+        self._pending_len = 0
+        self._recent = ""
+        return rest or None
+
+    def text(self) -> str:
+        if self._final is not None:
+            return self._final.strip()
+        return "".join(self._parts).strip()
+
+    def _may_cut(self, window: str, delta_len: int) -> bool:
+        if self.mode == "section":
+            if SECTION_HEADING_PATTERN.search(window):
+                return True
+            if self._pending_len <= SECTION_MAX_CHARS:
+                return False
+            # Just went over the limit: earlier breaks become cut points too.
+            if self._pending_len - delta_len <= SECTION_MAX_CHARS:
+                return True
+        return PARAGRAPH_BREAK in window
+
+    def _cut_sections(self) -> list[str]:
+        pending = "".join(self._pending)
+        sections = []
+        while True:
+            boundary, skip = self._find_boundary(pending)
+            if boundary < 0:
+                break
+            section = pending[:boundary].strip()
+            pending = pending[boundary + skip :]
+            if section:
+                sections.append(section)
+        self._pending = [pending] if pending else []
+        self._pending_len = len(pending)
+        return sections
+
+    def _find_boundary(self, pending: str) -> tuple[int, int]:
+        if self.mode == "section":
+            for m in SECTION_HEADING_PATTERN.finditer(pending):
+                if pending[: m.start()].strip():
+                    return m.start(), 0
+            if len(pending) <= SECTION_MAX_CHARS:
+                return -1, 0
+        idx = pending.find(PARAGRAPH_BREAK, PARAGRAPH_MIN_CHARS)
+        return idx, len(PARAGRAPH_BREAK)
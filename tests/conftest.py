@@ -0,0 +1,13 @@
+import sys
+import types
+from pathlib import Path
+
+# AstrBot loads the plugin directory as the ``astrbot_plugin_liuyao`` package;
+# register it the same way so the modules' relative imports resolve.
+PLUGIN_DIR = Path(__file__).resolve().parent.parent
+PACKAGE = "astrbot_plugin_liuyao"
+
+if PACKAGE not in sys.modules:
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [str(PLUGIN_DIR)]
+    sys.modules[PACKAGE] = package
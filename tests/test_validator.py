@@ -0,0 +1,39 @@
+from astrbot_plugin_liuyao.parser import LiuYaoParser
+from astrbot_plugin_liuyao.validator import validate
+
+CHART = """灵光象吉·六爻排盘
+时间：2059年11月22日 18:34:00
+占问：猫猫在哪
+壬辰年 乙丑月 辛巳日 戊辰时
+午未空 戌亥空 申酉空 戌亥空
+本卦：{ben}/乾宫·3
+变卦：{bian}/兑宫·4
+螣蛇 父戌 父戌 —O　　　 父未 - -
+勾陈 兄申 兄申 —　　应 兄酉 —
+朱雀 官午 官午 —　　　 孙亥 —
+青龙 父辰 兄申 —　　　 兄申 —
+玄武 财寅 官午 - -　　世 官午 - -
+白虎 孙子 父辰 - -　　　 父辰 - -
+"""
+
+
+def _codes(ben: str, bian: str) -> list[str]:
+    ok, errors = validate(LiuYaoParser.parse(CHART.format(ben=ben, bian=bian)))
+    assert ok == (not errors)
+    return [err["code"] for err in errors]
+
+
+def test_standard_names_pass():
+    assert _codes("天山遁", "泽山咸") == []
+
+
+def test_variant_names_resolve():
+    assert _codes("天山遯", "澤山咸") == []
+
+
+def test_unknown_names_are_not_compared():
+    assert _codes("遁卦（自定义）", "咸卦（自定义）") == []
+
+
+def test_mismatched_names_still_rejected():
+    assert _codes("天风姤", "泽地萃") == ["E301", "E304"]
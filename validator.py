@@ -1,5 +1,15 @@
 from typing import Any
 
+from .ganzhi import (
+    JIAZI,
+    PILLAR_NAMES,
+    calendar_pillars,
+    parse_cast_time,
+    parse_kong,
+    parse_pillars,
+    xun_kong,
+)
+from .hexagram import derive_hexagrams, lookup_hexagram
 from .keys import (
     BASE_INFO_KEY,
     ERRORS_KEY,
@@ -7,11 +17,15 @@ from .keys import (
     FIELD_BIAN_YINYANG,
     FIELD_INDEX,
     FIELD_MOVING,
+    FIELD_SHI_YING,
     YAO_DATA_KEY,
 )
 
 
-def validate(parsed_json: dict[str, Any]) -> tuple[bool, list[dict[str, str]]]:
+def validate(
+    parsed_json: dict[str, Any], check_calendar: bool = False
+) -> tuple[bool, list[dict[str, str]]]:
+    """``check_calendar`` also recomputes 四柱 from 起卦时间 (E403)."""
     errors: list[dict[str, str]] = list(parsed_json.get(ERRORS_KEY, []))
     yao_list = parsed_json.get(YAO_DATA_KEY, [])
 
@@ -49,9 +63,140 @@ def validate(parsed_json: dict[str, Any]) -> tuple[bool, list[dict[str, str]]]:
                 },
             )
 
+    if len(yao_list) == 6 and sorted(indexes) == [1, 2, 3, 4, 5, 6]:
+        errors.extend(_check_hexagram(parsed_json.get(BASE_INFO_KEY) or {}, yao_list))
+    errors.extend(_check_ganzhi(parsed_json.get(BASE_INFO_KEY) or {}, check_calendar))
+
     return len(errors) == 0, errors
 
 
+def _check_hexagram(
+    base_info: dict[str, Any], yao_list: list[dict[str, Any]]
+) -> list[dict[str, str]]:
+    """Cross-check the header against the hexagram derived from the lines."""
+    errors: list[dict[str, str]] = []
+    ben, bian = derive_hexagrams(yao_list)
+    if ben is None:
+        return errors
+
+    # Names that do not resolve (an app's own naming) are left unchecked.
+    header_ben = base_info.get("主卦")
+    named_ben = lookup_hexagram(header_ben)
+    if named_ben is not None and named_ben is not ben:
+        errors.append(
+            {
+                "code": "E301",
+                "message": f"主卦为「{header_ben}」，但六爻阴阳对应「{ben.name}」。",
+            },
+        )
+
+    palace = (base_info.get("所属宫位") or "").strip().removesuffix("宫")
+    if palace and palace != ben.palace:
+        errors.append(
+            {
+                "code": "E302",
+                "message": (
+                    f"所属宫位为「{palace}宫」，但「{ben.name}」属{ben.palace}宫。"
+                ),
+            },
+        )
+
+    marks = {
+        item.get(FIELD_SHI_YING): item.get(FIELD_INDEX)
+        for item in yao_list
+        if item.get(FIELD_SHI_YING)
+    }
+    if marks.get("世", ben.shi) != ben.shi or marks.get("应", ben.ying) != ben.ying:
+        errors.append(
+            {
+                "code": "E303",
+                "message": (
+                    f"「{ben.name}」应为世在第 {ben.shi} 爻、应在第 {ben.ying} 爻，"
+                    f"当前为世 {marks.get('世')}、应 {marks.get('应')}。"
+                ),
+            },
+        )
+
+    header_bian = base_info.get("变卦")
+    named_bian = lookup_hexagram(header_bian)
+    if named_bian is not None and bian is not None and named_bian is not bian:
+        errors.append(
+            {
+                "code": "E304",
+                "message": f"变卦为「{header_bian}」，但变爻阴阳对应「{bian.name}」。",
+            },
+        )
+    return errors
+
+
+def _check_ganzhi(
+    base_info: dict[str, Any], check_calendar: bool
+) -> list[dict[str, str]]:
+    """Cross-check 空亡 (and optionally 起卦时间) against the 四柱."""
+    text = base_info.get("四柱")
+    if not text:
+        return []
+    pillars = parse_pillars(text)
+    if len(pillars) != 4:
+        return [
+            {
+                "code": "E401",
+                "message": f"四柱「{text}」无法识别为年、月、日、时四个干支。",
+            },
+        ]
+
+    errors: list[dict[str, str]] = []
+    # 空亡_raw lists the 旬空 of each pillar in order, or of the day only.
+    kong = parse_kong(base_info.get("空亡_raw"))
+    if len(kong) == 4:
+        expected = [xun_kong(pillars[name]) for name in PILLAR_NAMES]
+    elif len(kong) == 1:
+        expected = [xun_kong(pillars["日"])]
+    else:
+        expected = []
+    if kong and not expected:
+        errors.append(
+            {
+                "code": "E402",
+                "message": (
+                    f"空亡「{' '.join(kong)}」共 {len(kong)} 组，"
+                    "应为四柱各一组（4 组）或仅日柱一组。"
+                ),
+            },
+        )
+    elif kong != expected:
+        errors.append(
+            {
+                "code": "E402",
+                "message": (
+                    f"空亡为「{' '.join(kong)}」，"
+                    f"但按四柱推得「{' '.join(expected)}」。"
+                ),
+            },
+        )
+
+    moment = parse_cast_time(base_info.get("起卦时间")) if check_calendar else None
+    if moment is not None:
+        computed = calendar_pillars(moment)
+        wrong = [
+            f"{JIAZI[pillars[name]]}{name}（应为{JIAZI[computed[name]]}）"
+            for name in PILLAR_NAMES
+            if name in computed and computed[name] != pillars[name]
+        ]
+        if wrong:
+            errors.append(
+                {
+                    "code": "E403",
+                    "message": (
+                        f"四柱与起卦时间 {base_info.get('起卦时间')} 不符："
+                        + "、".join(wrong)
+                        + "。"
+                    ),
+                },
+            )
+    return errors
+
+
 def format_errors(errors: list[dict[str, str]]) -> str:
     if not errors:
         return "未知错误。"
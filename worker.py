@@ -0,0 +1,116 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
+
+from .formats import parse_chart
+from .validator import validate
+
+POOL_MODES = ("inline", "thread", "process")
+
+ParseResult = tuple[dict[str, Any], bool, list[dict[str, str]]]
+
+
+def parse_and_validate(raw_text: str, check_calendar: bool = False) -> ParseResult:
+    parsed = parse_chart(raw_text)
+    ok, errors = validate(parsed, check_calendar)
+    return parsed, ok, errors
+
+
+def parse_and_validate_timed(
+    raw_text: str, check_calendar: bool = False
+) -> tuple[ParseResult, float, float]:
+    """``parse_and_validate`` plus parse and validate wall time in ms."""
+    start = time.perf_counter()
+    parsed = parse_chart(raw_text)
+    parsed_at = time.perf_counter()
+    ok, errors = validate(parsed, check_calendar)
+    done = time.perf_counter()
+    return (
+        (parsed, ok, errors),
+        (parsed_at - start) * 1000,
+        (done - parsed_at) * 1000,
+    )
+
+
+def parse_and_validate_many(
+    texts: list[str], check_calendar: bool = False
+) -> list[ParseResult]:
+    return [parse_and_validate(text, check_calendar) for text in texts]
+
+
+class ParseExecutor:
+    """Runs parse + validate either inline or on a worker pool.
+
+    Small single charts stay on the event loop (a pool hop costs more than the
+    parse itself); inputs at or above ``offload_threshold`` characters and all
+    batches are sent to the pool so other handlers on the loop keep running.
+    """
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        max_workers: int = 2,
+        offload_threshold: int = 2000,
+        check_calendar: bool = False,
+    ):
+        self.mode = mode if mode in POOL_MODES else "thread"
+        self.check_calendar = check_calendar
+        self.max_workers = max(1, int(max_workers))
+        self.offload_threshold = max(0, int(offload_threshold))
+        self._executor: Executor | None = None
+
+    async def run(
+        self, raw_text: str, timings: dict[str, float] | None = None
+    ) -> ParseResult:
+        """Parse one chart; fills ``timings`` with parse/validate ms if given."""
+        if self.mode == "inline" or len(raw_text) < self.offload_threshold:
+            result, parse_ms, validate_ms = parse_and_validate_timed(
+                raw_text, self.check_calendar
+            )
+        else:
+            loop = asyncio.get_running_loop()
+            result, parse_ms, validate_ms = await loop.run_in_executor(
+                self._get_executor(),
+                parse_and_validate_timed,
+                raw_text,
+                self.check_calendar,
+            )
+        if timings is not None:
+            timings["parse"] = parse_ms
+            timings["validate"] = validate_ms
+        return result
+
+    async def run_many(self, texts: list[str]) -> list[ParseResult]:
+        if self.mode == "inline" or not texts:
+            return parse_and_validate_many(texts, self.check_calendar)
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        # One task per worker keeps pickling overhead low in process mode.
+        size = -(-len(texts) // self.max_workers)
+        chunks = [texts[i : i + size] for i in range(0, len(texts), size)]
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    executor, parse_and_validate_many, chunk, self.check_calendar
+                )
+                for chunk in chunks
+            ),
+        )
+        return [item for chunk in results for item in chunk]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="liuyao-parse",
+                )
+        return self._executor